@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import sys
+import time
+
+# Path to the parking application script (its file name has a space, so it cannot be imported normally)
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fb 3.py")
+
+
+# Function to load the parking application as a module without starting the Tk main loop
+def load_app():
+    if "parking_app" in sys.modules:
+        return sys.modules["parking_app"]
+
+    spec = importlib.util.spec_from_file_location("parking_app", APP_PATH)
+    app = importlib.util.module_from_spec(spec)
+    sys.modules["parking_app"] = app
+    spec.loader.exec_module(app)
+    return app
+
+
+# Function to time a callable and return the per-call latencies in seconds
+def time_calls(func, iterations, *args):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# Function to summarise a list of latencies in milliseconds
+def summarise(latencies):
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "calls": count,
+        "mean_ms": 1000 * sum(ordered) / count,
+        "p50_ms": 1000 * ordered[count // 2],
+        "p90_ms": 1000 * ordered[min(count - 1, int(count * 0.9))],
+        "p99_ms": 1000 * ordered[min(count - 1, int(count * 0.99))],
+        "per_second": count / max(sum(ordered), 1e-12),
+    }
@@ -0,0 +1,116 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from _app import load_app, summarise
+from bench_save_data import FakeDatabase
+
+
+# Function to generate a history of visits, a fixed number per day, spread over as many days as needed
+def generate_visits(app, visits, per_day, vehicles, seed=0):
+    rng = random.Random(seed)
+    started = datetime(2020, 1, 1)
+    for index in range(visits):
+        exit_time = started + timedelta(days=index // per_day, seconds=(index % per_day) * 86400 // per_day)
+        exit_text = exit_time.strftime("%Y-%m-%d %H:%M:%S")
+        plate = rng.randrange(vehicles)
+        vehicle_number = f"KA{plate // 10000 % 100:02d}AB{plate % 10000:04d}"
+        yield app.exit_event_id(exit_text), vehicle_number, {
+            "entry_time": (exit_time - timedelta(hours=2)).strftime("%Y-%m-%d %H:%M:%S"),
+            "exit_time": exit_text,
+            "parking_slot": rng.randrange(1, 100),
+            "total_cost": 40.0,
+        }, exit_time
+
+
+# Firebase layout: time partitions with a per-plate index, built directly in the in-memory database
+def build_firebase(app, visits, per_day, vehicles):
+    database = FakeDatabase()
+    root = database.tree.setdefault("parking_data", {})
+    history, index = root.setdefault("exit_history", {}), root.setdefault("exit_index", {})
+    last = None
+    for event_id, vehicle_number, exit_data, last in generate_visits(app, visits, per_day, vehicles):
+        partition = app.exit_partition(last)
+        history.setdefault(partition, {})[event_id] = dict(exit_data, vehicle_number=vehicle_number)
+        index.setdefault(vehicle_number, {})[event_id] = partition
+    return database, app.FirebaseStorage(database, None), last
+
+
+def build_sqlite(app, visits, per_day, vehicles, directory):
+    storage = app.SQLiteStorage(os.path.join(directory, f"history{visits}.db"))
+    rows, last = [], None
+    for event_id, vehicle_number, exit_data, last in generate_visits(app, visits, per_day, vehicles):
+        rows.append((event_id, vehicle_number, exit_data["entry_time"], exit_data["exit_time"],
+                     exit_data["parking_slot"], exit_data["total_cost"]))
+    with storage.connection:
+        storage.connection.executemany(
+            "INSERT INTO exit_logs (event_id, vehicle_number, entry_time, exit_time, parking_slot, total_cost) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows)
+    return storage, last
+
+
+# The old way to answer a range query: download the whole exit node and scan it
+def scan_everything(app, database, start, end):
+    history = database.child("parking_data").child("exit_history").get().val() or {}
+    events = [dict(event, event_id=event_id) for partition in history.values() for event_id, event in partition.items()]
+    return app.select_exits(events, start, end)
+
+
+# Function to time a query a number of times and return its summary and the size of its result
+def time_query(query, repeats):
+    latencies, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = query()
+        latencies.append(time.perf_counter() - start)
+    return summarise(latencies), len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exit history query cost as the history grows")
+    parser.add_argument("--visits", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--per-day", type=int, default=1000, help="visits per day of history")
+    parser.add_argument("--visits-per-vehicle", type=int, default=20, help="average visits of one vehicle")
+    parser.add_argument("--backends", nargs="+", default=["firebase", "sqlite"], choices=["firebase", "sqlite"])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--scan-limit", type=int, default=100000, help="largest history the full scan is run on")
+    args = parser.parse_args()
+    app = load_app()
+
+    print(f"{'visits':>9} {'backend':>9} {'query':>16} {'rows':>6} {'KB read':>9} {'mean ms':>9} {'p99 ms':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for visits in args.visits:
+            vehicles = max(1, visits // args.visits_per_vehicle)
+            for backend in args.backends:
+                database = None
+                if backend == "firebase":
+                    database, storage, last = build_firebase(app, visits, args.per_day, vehicles)
+                else:
+                    storage, last = build_sqlite(app, visits, args.per_day, vehicles, directory)
+
+                # The last full day of history, and one hour of it
+                day = last.replace(hour=0, minute=0, second=0)
+                hour = day.replace(hour=12)
+                queries = {
+                    "exits in a day": lambda: storage.exits_between(day, day + timedelta(days=1)),
+                    "exits in an hour": lambda: storage.exits_between(hour, hour + timedelta(hours=1)),
+                    "vehicle history": lambda: storage.exit_history("KA00AB0007"),
+                }
+                if database and visits <= args.scan_limit:
+                    queries["day by full scan"] = lambda: scan_everything(app, database, day, day + timedelta(days=1))
+                for name, query in queries.items():
+                    read_before = database.bytes_read if database else 0
+                    summary, rows = time_query(query, args.repeats)
+                    read = f"{(database.bytes_read - read_before) / args.repeats / 1024:.1f}" if database else "-"
+                    print(f"{visits:>9} {backend:>9} {name:>16} {rows:>6} {read:>9} "
+                          f"{summary['mean_ms']:>9.3f} {summary['p99_ms']:>9.3f}")
+                if backend == "sqlite":
+                    storage.close()
+                del storage, database
+
+
+if __name__ == "__main__":
+    main()
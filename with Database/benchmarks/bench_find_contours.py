@@ -0,0 +1,63 @@
+import argparse
+
+import cv2
+import numpy as np
+
+from _app import load_app, summarise, time_calls
+
+
+# Function to render a cluttered parking-lot style edge image with thousands of closed contours
+def make_cluttered_edges(width, height, shapes, seed=0):
+    rng = np.random.default_rng(seed)
+    image = np.zeros((height, width), dtype=np.uint8)
+    for _ in range(shapes):
+        x, y = int(rng.integers(0, width - 80)), int(rng.integers(0, height - 80))
+        w, h = int(rng.integers(4, 80)), int(rng.integers(4, 80))
+        cv2.rectangle(image, (x, y), (x + w, y + h), 255, 1)
+
+    # A few plate-sized rectangles so the candidate stage has work to do
+    for index in range(5):
+        x, y = 50 + 200 * index, height - 150
+        cv2.rectangle(image, (x, y), (x + 180, y + 45), 255, 2)
+    return image
+
+
+# The original implementation: RETR_TREE, two contourArea calls per contour and a Python geometry loop
+def baseline_candidates(edges):
+    contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+    filtered = [cnt for cnt in contours if cv2.contourArea(cnt) > 1000]
+    filtered = sorted(filtered, key=cv2.contourArea, reverse=True)[:10]
+
+    candidates = []
+    for contour in filtered:
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            x, y, w, h = cv2.boundingRect(contour)
+            if 2.0 < float(w) / h < 6.0:
+                candidates.append((x, y, w, h))
+    return candidates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Candidate extraction on frames with thousands of contours")
+    parser.add_argument("--shapes", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    app = load_app()
+    edges = make_cluttered_edges(1920, 1080, args.shapes)
+    contour_count = len(cv2.findContours(edges, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)[0])
+
+    def vectorized(image):
+        return app.extract_plate_candidates(app.find_contours(image))[0]
+
+    if sorted(map(tuple, vectorized(edges).tolist())) != sorted(baseline_candidates(edges)):
+        print("warning: vectorized candidates differ from the baseline")
+
+    print(f"{contour_count} contours per frame")
+    print(f"baseline:   {summarise(time_calls(baseline_candidates, args.iterations, edges))}")
+    print(f"vectorized: {summarise(time_calls(vectorized, args.iterations, edges))}")
+
+
+if __name__ == "__main__":
+    main()
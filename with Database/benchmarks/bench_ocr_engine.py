@@ -0,0 +1,41 @@
+import argparse
+import time
+
+import pytesseract
+
+from _app import load_app
+from bench_roi_ocr import make_roi
+
+
+# Function to measure calls per second of an OCR callable over a fixed ROI
+def calls_per_second(ocr, roi, duration):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        ocr(roi)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent OCR engine versus a pytesseract subprocess per call")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run each path")
+    args = parser.parse_args()
+
+    app = load_app()
+    roi = make_roi(240, 60)
+
+    subprocess_rate = calls_per_second(lambda image: pytesseract.image_to_string(image, config='--oem 3 --psm 7'),
+                                       roi, args.duration)
+    print(f"pytesseract subprocess: {subprocess_rate:.1f} calls/s")
+
+    if app.ocr_engine.api is None:
+        print("tesserocr is not installed, so the persistent engine falls back to the subprocess path")
+        return
+
+    engine_rate = calls_per_second(app.ocr_engine.image_to_string, roi, args.duration)
+    print(f"persistent engine:      {engine_rate:.1f} calls/s ({engine_rate / subprocess_rate:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
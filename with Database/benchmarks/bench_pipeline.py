@@ -0,0 +1,100 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+from datetime import datetime
+
+import numpy as np
+
+from _app import load_app, summarise
+from synthetic import render_frame
+
+# Scenario grid: plate width in pixels, corner skew, sensor noise and number of clutter shapes
+PLATE_WIDTHS = (160, 320)
+SKEWS = (0.0, 0.4)
+NOISE_LEVELS = (0.0, 8.0)
+CLUTTER = (0, 60)
+
+
+# Function to time one call and append the latency to a stage
+def timed(latencies, stage, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    latencies.setdefault(stage, []).append(time.perf_counter() - start)
+    return result
+
+
+# Function to run every stage of the recognition pipeline on the frames of one scenario
+def run_scenario(app, frames, ocr):
+    latencies = {}
+    hits = 0
+    for frame, text, _ in frames:
+        edges = timed(latencies, "preprocess_image", app.preprocess_image, frame)
+        contours = timed(latencies, "find_contours", app.find_contours, edges)
+        timed(latencies, "extract_plate_candidates", app.extract_plate_candidates, contours)
+        candidates = timed(latencies, "find_plate_candidates", app.find_plate_candidates, frame)
+        crops = [timed(latencies, "crop_plate", app.crop_plate, frame, candidate) for candidate in candidates]
+
+        if ocr:
+            for crop in crops:
+                timed(latencies, "extract_text_from_image", app.extract_text_from_image, crop)
+
+            # The full pipeline as the capture loop runs it, without the OCR cache so every frame pays full price
+            read = timed(latencies, "read_number_plate", app.read_number_plate, frame)
+            hits += read == text
+
+    result = {stage: summarise(values) for stage, values in latencies.items()}
+    if ocr:
+        result["accuracy"] = hits / len(frames)
+    return result
+
+
+# Function to print the p50 change of every stage against an earlier run
+def compare(results, previous_path):
+    with open(previous_path) as f:
+        previous = {scenario["name"]: scenario["stages"] for scenario in json.load(f)["scenarios"]}
+    for scenario in results["scenarios"]:
+        before = previous.get(scenario["name"], {})
+        for stage, stats in scenario["stages"].items():
+            if isinstance(stats, dict) and stage in before:
+                change = stats["p50_ms"] / max(before[stage]["p50_ms"], 1e-9) - 1
+                print(f"{scenario['name']:40s} {stage:26s} p50 {before[stage]['p50_ms']:8.3f} -> "
+                      f"{stats['p50_ms']:8.3f} ms ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage and end-to-end benchmark on synthetic plate frames")
+    parser.add_argument("--frames", type=int, default=20, help="frames per scenario")
+    parser.add_argument("--ocr", action="store_true", help="include the OCR stages and end-to-end reads (needs tesseract)")
+    parser.add_argument("--output", default="pipeline_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app()
+    rng = np.random.default_rng(args.seed)
+
+    results = {"created": datetime.now().isoformat(), "python": platform.python_version(),
+               "machine": platform.machine(), "frames_per_scenario": args.frames, "scenarios": []}
+    for plate_width, skew, noise, clutter in itertools.product(PLATE_WIDTHS, SKEWS, NOISE_LEVELS, CLUTTER):
+        name = f"width={plate_width} skew={skew} noise={noise} clutter={clutter}"
+        frames = [render_frame(rng, plate_width=plate_width, skew=skew, noise=noise, clutter=clutter)
+                  for _ in range(args.frames)]
+        stages = run_scenario(app, frames, args.ocr)
+        results["scenarios"].append({"name": name, "plate_width": plate_width, "skew": skew, "noise": noise,
+                                     "clutter": clutter, "stages": stages})
+
+        summary = ", ".join(f"{stage} {stats['p50_ms']:.2f}" for stage, stats in stages.items() if isinstance(stats, dict))
+        print(f"{name}: p50 ms {summary}")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"results saved to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import argparse
+import collections
+import os
+import random
+import re
+import string
+
+import cv2
+
+from _app import load_app
+
+# OCR mix-ups between similar looking letters and digits, used by the simulation
+CONFUSIONS = {"0": "O", "O": "0", "1": "I", "I": "1", "8": "B", "B": "8", "5": "S", "S": "5", "2": "Z", "Z": "2"}
+
+# Characters the plate border and screws tend to be read as
+STRAY_CHARACTERS = "1I|"
+
+# The plate format the original filter accepted
+PLATE_PATTERN = re.compile(r'^[A-Za-z]{2}\s?\d{2}\s?[A-Za-z]{1,2}\s?\d{4}$')
+
+
+# The original filtering: the plate regex on the raw OCR output, no correction
+def baseline_filter(text):
+    match = PLATE_PATTERN.search(text)
+    return (match.group() if match else '').replace(" ", "").strip()
+
+
+# Function to count frames until the first read that validates as a plate; returns the frame count (None
+# when nothing validates) and whether that read is the labelled plate, since a wrong plate would be billed
+def frames_to_valid_read(reads, label):
+    for index, read in enumerate(reads, start=1):
+        if PLATE_PATTERN.match(read):
+            return index, read == label
+    return None, False
+
+
+def report(name, results):
+    solved = [frames for frames, correct in results if correct]
+    wrong = sum(1 for frames, correct in results if frames is not None and not correct)
+    mean = sum(solved) / len(solved) if solved else float('nan')
+    print(f"{name:10s} read {len(solved)}/{len(results)} plates, {wrong} wrong plates, "
+          f"mean frames to valid read {mean:.2f}")
+
+
+# Function to generate an Indian-format plate number
+def random_plate(rng):
+    letters = string.ascii_uppercase
+    series = ''.join(rng.choice(letters) for _ in range(rng.choice((1, 2))))
+    return (''.join(rng.choice(letters) for _ in range(2)) + f"{rng.randrange(100):02d}" + series
+            + f"{rng.randrange(10000):04d}")
+
+
+# Function to imitate an OCR read of a plate: ambiguous characters get swapped, separators added and the
+# plate border sometimes read as an extra character on either side
+def simulate_read(rng, plate, error_rate, stray_rate):
+    read = ''.join(CONFUSIONS[c] if c in CONFUSIONS and rng.random() < error_rate else c for c in plate)
+    read = f"{read[:2]} {read[2:4]} {read[4:-4]} {read[-4:]}"
+    if rng.random() < stray_rate:
+        read = rng.choice(STRAY_CHARACTERS) + read
+    if rng.random() < stray_rate:
+        read = read + rng.choice(STRAY_CHARACTERS)
+    return read + "\n"
+
+
+def run_simulation(app, plates, frames, error_rate, stray_rate, seed):
+    rng = random.Random(seed)
+    baseline, corrected = [], []
+    for _ in range(plates):
+        label = random_plate(rng)
+        texts = [simulate_read(rng, label, error_rate, stray_rate) for _ in range(frames)]
+        baseline.append(frames_to_valid_read([baseline_filter(text) for text in texts], label))
+        corrected.append(frames_to_valid_read([app.correct_plate_text(text) for text in texts], label))
+    report("baseline", baseline)
+    report("corrected", corrected)
+
+
+# Labeled crops are named <PLATE>_<frame>.jpg; the frames of one plate are read in file name order
+def run_labeled(app, directory):
+    sequences = collections.defaultdict(list)
+    for name in sorted(os.listdir(directory)):
+        label = name.split("_")[0].upper()
+        sequences[label].append(os.path.join(directory, name))
+
+    unconstrained = app.OCREngine(whitelist=None)
+    baseline, corrected = [], []
+    for label, paths in sequences.items():
+        crops = [cv2.imread(path) for path in paths]
+        baseline.append(frames_to_valid_read([baseline_filter(unconstrained.image_to_string(crop)) for crop in crops],
+                                             label))
+        corrected.append(frames_to_valid_read([app.extract_text_from_image(crop) for crop in crops], label))
+    report("baseline", baseline)
+    report("corrected", corrected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Frames until a valid plate read, with and without grammar correction")
+    parser.add_argument("--labeled", help="directory of labeled plate crops named <PLATE>_<frame>.jpg")
+    parser.add_argument("--plates", type=int, default=2000, help="simulated plates when no labeled set is given")
+    parser.add_argument("--frames", type=int, default=10, help="simulated frames per plate")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="chance an ambiguous character is misread")
+    parser.add_argument("--stray-rate", type=float, default=0.1, help="chance of a border character on each side")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app()
+    if args.labeled:
+        run_labeled(app, args.labeled)
+    else:
+        run_simulation(app, args.plates, args.frames, args.error_rate, args.stray_rate, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import argparse
+
+import numpy as np
+
+from _app import load_app, summarise, time_calls
+from synthetic import render_frame
+
+
+# Function to read the plate candidates of a frame in order, like read_number_plate, with the given crop mode
+def first_read(app, frame, rectify):
+    app.RECTIFY_PLATES = rectify
+    for candidate in app.find_plate_candidates(frame):
+        text = app.extract_text_from_image(app.crop_plate(frame, candidate))
+        if text:
+            return text
+    return ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Axis-aligned plate crops versus rectified plates on skewed synthetic frames")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--skew", type=float, default=0.4, help="corner jitter as a fraction of the plate height")
+    parser.add_argument("--ocr", action="store_true", help="also measure first-frame hits (needs tesseract)")
+    args = parser.parse_args()
+
+    app = load_app()
+    rng = np.random.default_rng(0)
+    frames = [render_frame(rng, skew=args.skew, noise=4) for _ in range(args.frames)]
+
+    # The largest candidate of every frame that has one
+    plates = [(frame, candidates[0]) for frame, _, _ in frames
+              for candidates in [app.find_plate_candidates(frame)] if candidates]
+
+    # Size of the OCR input and the cost of producing it in both modes
+    for rectify in (False, True):
+        app.RECTIFY_PLATES = rectify
+        pixels = [app.crop_plate(frame, candidate).size for frame, candidate in plates]
+        crop_time = summarise([latency / len(plates) for latency in time_calls(
+            lambda: [app.crop_plate(frame, candidate, copy=True) for frame, candidate in plates], 10)])
+        print(f"rectify={rectify}: mean OCR input {np.mean(pixels):.0f} values over {len(plates)} plates, "
+              f"crop time {crop_time['mean_ms']:.3f} ms per plate")
+
+        if args.ocr:
+            hits = sum(first_read(app, frame, rectify) == text for frame, text, _ in frames)
+            print(f"rectify={rectify}: first-frame hits {hits}/{len(frames)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from _app import load_app, summarise, time_calls
+
+
+# Function to build a plate-sized ROI with some texture so JPEG encoding does real work
+def make_roi(width, height):
+    rng = np.random.default_rng(0)
+    roi = np.full((height, width, 3), 235, dtype=np.uint8)
+    roi += rng.integers(0, 20, roi.shape, dtype=np.uint8)
+    cv2.putText(roi, "KA01AB1234", (5, int(height * 0.7)), cv2.FONT_HERSHEY_SIMPLEX,
+                height / 45, (0, 0, 0), 2)
+    return roi
+
+
+# Old path: write the ROI as JPEG, read it back, then OCR
+def disk_round_trip(roi, path):
+    cv2.imwrite(path, roi)
+    return cv2.imread(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-candidate cost of the JPEG round-trip versus the in-memory ROI path")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--width", type=int, default=240)
+    parser.add_argument("--height", type=int, default=60)
+    parser.add_argument("--ocr", action="store_true", help="also run tesseract on both paths (needs tesseract installed)")
+    args = parser.parse_args()
+
+    roi = make_roi(args.width, args.height)
+    path = os.path.join(tempfile.mkdtemp(), "number_plate_image.jpg")
+
+    round_trip = summarise(time_calls(disk_round_trip, args.iterations, roi, path))
+    print(f"disk round-trip overhead per candidate: {round_trip}")
+
+    if args.ocr:
+        app = load_app()
+        iterations = max(1, args.iterations // 10)
+        old = summarise(time_calls(lambda: app.extract_text_from_image(disk_round_trip(roi, path)), iterations))
+        new = summarise(time_calls(app.extract_text_from_image, iterations, roi))
+        print(f"OCR via disk:      {old}")
+        print(f"OCR via ROI view:  {new}")
+        print(f"saved per candidate: {old['mean_ms'] - new['mean_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
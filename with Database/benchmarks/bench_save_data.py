@@ -0,0 +1,229 @@
+import argparse
+import json
+import threading
+import time
+import types
+from datetime import datetime, timedelta
+
+from _app import load_app, summarise
+
+
+# In-memory stand-in for the pyrebase database that keeps the tree and the JSON bodies sent to it, and
+# streams changes to listeners the way the realtime database does
+class FakeDatabase:
+    def __init__(self):
+        self.tree = {}
+        self.payloads = []
+        self.bytes_read = 0
+        self.streams = []
+        self.lock = threading.RLock()
+
+    def child(self, *path):
+        return FakeReference(self, list(path))
+
+
+# Raised like the HTTP 400 Firebase answers a request it refuses with
+class FakeHTTPError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.response = types.SimpleNamespace(status_code=status_code)
+
+
+class FakeResponse:
+    def __init__(self, value):
+        self.value = value
+
+    def val(self):
+        return self.value
+
+
+class FakeReference:
+    def __init__(self, database, path):
+        self.database = database
+        self.path = path
+
+    def child(self, *path):
+        return FakeReference(self.database, self.path + list(path))
+
+    def _node(self):
+        node = self.database.tree
+        for key in self.path:
+            node = node.setdefault(key, {})
+        return node
+
+    def _value(self):
+        node = self.database.tree
+        for key in self.path:
+            node = node.get(key) if isinstance(node, dict) else None
+        body = json.dumps(node)
+        self.database.bytes_read += len(body)
+        return json.loads(body)
+
+    def get(self):
+        # pyrebase downloads the whole node as one JSON body
+        with self.database.lock:
+            return FakeResponse(self._value())
+
+    def set(self, data):
+        # pyrebase sends the data as a JSON body with a PUT
+        with self.database.lock:
+            self.database.payloads.append(len(json.dumps(data)))
+            *parents, key = self.path
+            FakeReference(self.database, parents)._node()[key] = json.loads(json.dumps(data))
+            self._notify([(self.path, data)])
+
+    def update(self, data):
+        # A PATCH with "a/b" keys writes every path independently and null deletes it; like Firebase, a
+        # patch where one path lies below another is refused as a whole
+        paths = set(data)
+        for path in paths:
+            keys = path.split("/")
+            for index in range(1, len(keys)):
+                if "/".join(keys[:index]) in paths:
+                    raise FakeHTTPError(f"Invalid data; path {path} overlaps {'/'.join(keys[:index])}")
+        with self.database.lock:
+            self.database.payloads.append(len(json.dumps(data)))
+            node = self._node()
+            for path, value in data.items():
+                *parents, key = path.split("/")
+                target = node
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                if value is None:
+                    target.pop(key, None)
+                else:
+                    target[key] = json.loads(json.dumps(value))
+            self._notify([(self.path + path.split("/"), value) for path, value in data.items()])
+
+    def _notify(self, changes):
+        # A change below a stream arrives as a put at its relative path; a change above it resends the node
+        for reference, handler in list(self.database.streams):
+            for path, value in changes:
+                if path[:len(reference.path)] == reference.path:
+                    relative = "/" + "/".join(path[len(reference.path):])
+                    handler({"event": "put", "path": relative, "data": json.loads(json.dumps(value))})
+                elif reference.path[:len(path)] == path:
+                    handler({"event": "put", "path": "/", "data": reference._value()})
+
+    def stream(self, handler):
+        # Like pyrebase, the stream opens with a put of the whole node
+        with self.database.lock:
+            self.database.streams.append((self, handler))
+            handler({"event": "put", "path": "/", "data": self._value()})
+        return FakeStream(self.database, (self, handler))
+
+
+class FakeStream:
+    def __init__(self, database, stream):
+        self.database = database
+        self.stream = stream
+
+    def close(self):
+        with self.database.lock:
+            self.database.streams.remove(self.stream)
+
+
+# Sends every logged event straight to the database, so the benchmark sees one write per event
+class DirectJournal:
+    def __init__(self, db):
+        self.db = db
+
+    def append(self, changes):
+        self.db.child("parking_data").update(changes)
+
+    def replay(self, data):
+        return data
+
+
+# The original persistence: an entry_logs write, then the whole parking_data node rewritten with set()
+def legacy_park(db, system, vehicle_number, entry_time, parking_slot):
+    entry = {"entry_time": entry_time.strftime("%Y-%m-%d %H:%M:%S"), "parking_slot": parking_slot}
+    db.child("parking_data").child("entry_logs").child(vehicle_number).set(entry)
+    system.sessions.parked_vehicles[vehicle_number] = entry
+    system.sessions.available_parking_slots.remove(parking_slot)
+    db.child("parking_data").set({"parked_vehicles": system.sessions.parked_vehicles,
+                                      "available_parking_slots": list(system.sessions.available_parking_slots)})
+
+
+def legacy_exit(db, system, vehicle_number, entry_time, exit_time, parking_slot, total_cost):
+    db.child("parking_data").child("exit_logs").child(vehicle_number).set({
+        "entry_time": entry_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "exit_time": exit_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "parking_slot": parking_slot,
+        "total_cost": total_cost,
+    })
+    system.sessions.available_parking_slots.add(parking_slot)
+    del system.sessions.parked_vehicles[vehicle_number]
+    db.child("parking_data").set({"parked_vehicles": system.sessions.parked_vehicles,
+                                      "available_parking_slots": list(system.sessions.available_parking_slots)})
+
+
+def delta_park(db, system, vehicle_number, entry_time, parking_slot):
+    system.record_entry(vehicle_number, entry_time, parking_slot)
+
+
+def delta_exit(db, system, vehicle_number, entry_time, exit_time, parking_slot, total_cost):
+    system.record_exit(vehicle_number, entry_time, exit_time, parking_slot, total_cost)
+
+
+# Function to fill a parking system with the given number of parked vehicles, without any writes
+def make_system(app, db, occupancy):
+    system = app.ParkingSystem.__new__(app.ParkingSystem)
+    system.storage = app.FirebaseStorage(db, DirectJournal(db))
+    started = datetime(2024, 1, 1, 8, 0)
+    parked_vehicles = {
+        f"KA{index % 100:02d}AB{index:04d}": {"entry_time": started.strftime("%Y-%m-%d %H:%M:%S"),
+                                             "parking_slot": index + 1}
+        for index in range(occupancy)
+    }
+    system.sessions = app.SessionIndex(parked_vehicles, range(occupancy + 1, occupancy + 11))
+    return system
+
+
+# Function to replay exit/park pairs at a constant occupancy and return the per-event payloads and latencies
+def run_events(app, occupancy, events, park, leave, rtt, bandwidth):
+    db = app.db = FakeDatabase()
+    system = make_system(app, db, occupancy)
+    entry_time = datetime(2024, 1, 1, 8, 0)
+    latencies = []
+    for index in range(events // 2):
+        # The oldest vehicle leaves and a new one takes its slot, so the occupancy stays the same
+        vehicle_number = next(iter(system.sessions.parked_vehicles))
+        parking_slot = system.sessions.parked_vehicles[vehicle_number]["parking_slot"]
+        exit_time = entry_time + timedelta(hours=2)
+        for action, args in ((leave, (vehicle_number, entry_time, exit_time, parking_slot, 40.0)),
+                             (park, (f"MH12XY{index:04d}", exit_time, parking_slot))):
+            writes = len(db.payloads)
+            start = time.perf_counter()
+            action(db, system, *args)
+            elapsed = time.perf_counter() - start
+
+            # Each write is one HTTP round trip plus the time to send its body over the link
+            sent = db.payloads[writes:]
+            latencies.append(elapsed + len(sent) * rtt + 8 * sum(sent) / bandwidth)
+
+    return db.payloads, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload size and write latency of save_data vs delta patches")
+    parser.add_argument("--occupancy", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--events", type=int, default=200, help="events (half exits, half entries) per run")
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="modelled round trip per Firebase write")
+    parser.add_argument("--bandwidth-mbps", type=float, default=10.0, help="modelled upload bandwidth")
+    args = parser.parse_args()
+    app = load_app()
+
+    rtt, bandwidth = args.rtt_ms / 1000, args.bandwidth_mbps * 1e6
+    print(f"Modelled link: {args.rtt_ms:.0f} ms round trip, {args.bandwidth_mbps:.0f} Mbit/s upload")
+    print(f"{'vehicles':>9} {'mode':>7} {'writes/event':>13} {'bytes/event':>12} {'mean ms':>9} {'p99 ms':>9}")
+    for occupancy in args.occupancy:
+        for mode, park, leave in (("legacy", legacy_park, legacy_exit), ("delta", delta_park, delta_exit)):
+            payloads, latencies = run_events(app, occupancy, args.events, park, leave, rtt, bandwidth)
+            summary = summarise(latencies)
+            print(f"{occupancy:>9} {mode:>7} {len(payloads) / len(latencies):>13.1f} "
+                  f"{sum(payloads) / len(latencies):>12.0f} {summary['mean_ms']:>9.2f} {summary['p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
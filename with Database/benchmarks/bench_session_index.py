@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from _app import load_app, summarise
+from bench_save_data import FakeDatabase
+
+
+# Function to start a terminal (a parking system without its Tk window) on the shared database
+def start_terminal(app, database, directory, name):
+    journal = app.WriteAheadLog(database, os.path.join(directory, f"{name}.jsonl"), name, retry_delay=0.05)
+    system = app.ParkingSystem.__new__(app.ParkingSystem)
+    system.storage = app.FirebaseStorage(database, journal.start())
+    system.load_data()
+    return system
+
+
+# Function to run random entries and exits on randomly picked terminals
+def run_events(terminals, events, seed=0):
+    rng = random.Random(seed)
+    clock = datetime(2024, 1, 1, 8, 0)
+    for index in range(events):
+        clock += timedelta(minutes=1)
+        system = rng.choice(terminals)
+        parked = system.sessions.vehicles()
+        free = system.sessions.free_slots()
+        if parked and (not free or rng.random() < 0.5):
+            vehicle_number = rng.choice(list(parked))
+            entry = parked[vehicle_number]
+            entry_time = datetime.strptime(entry["entry_time"], "%Y-%m-%d %H:%M:%S")
+            system.record_exit(vehicle_number, entry_time, clock, entry["parking_slot"], 20.0)
+        elif free:
+            system.record_entry(f"KA01AB{index:04d}", clock, rng.choice(list(free)))
+
+        # Give the other terminals' sync threads a moment, as the gap between two cars would
+        time.sleep(0.002)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exit lookups from the session index and terminal convergence")
+    parser.add_argument("--terminals", type=int, default=3)
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=100)
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="modelled round trip of a database read")
+    args = parser.parse_args()
+    app = load_app()
+    app.PARKING_SLOTS = args.slots
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = FakeDatabase()
+        terminals = [start_terminal(app, database, directory, f"terminal{index}") for index in range(args.terminals)]
+        run_events(terminals, args.events)
+        for system in terminals:
+            system.storage.journal.flush()
+
+        # Every terminal should hold the same view as the database, without having reloaded it
+        remote = database.tree["parking_data"]
+        expected = (remote.get("parked_vehicles", {}), app.parse_slots(remote.get("available_parking_slots", {})))
+        for index, system in enumerate(terminals):
+            view = (system.sessions.vehicles(), system.sessions.free_slots())
+            print(f"terminal{index}: {len(view[0])} parked, {system.sessions.remote_changes} stream events, "
+                  f"matches the database: {view == expected}")
+
+        # Exit lookups: the session index against one database read per exit
+        system = terminals[0]
+        plates = list(expected[0]) or ["XX00XX0000"]
+        latencies = []
+        for _ in range(10000):
+            plate = random.choice(plates)
+            start = time.perf_counter()
+            system.sessions.lookup(plate)
+            latencies.append(time.perf_counter() - start)
+        summary = summarise(latencies)
+        print(f"session index lookup: mean {1000 * summary['mean_ms']:.2f} us, p99 {1000 * summary['p99_ms']:.2f} us")
+        print(f"database read per exit: {args.rtt_ms:.0f} ms (modelled round trip)")
+
+        for system in terminals:
+            system.storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from _app import load_app, summarise
+from bench_save_data import FakeDatabase
+
+
+# Each backend opens a fresh store and reopens the same one, the way a restarted terminal would see it
+class MemoryBackend:
+    def __init__(self, app, directory):
+        self.store = app.MemoryStorage()
+
+    def open(self):
+        return self.store
+
+    def reopen(self, storage):
+        return self.store
+
+
+class SQLiteBackend:
+    def __init__(self, app, directory):
+        self.app = app
+        self.path = os.path.join(directory, "parking.db")
+
+    def open(self):
+        return self.app.SQLiteStorage(self.path)
+
+    def reopen(self, storage):
+        storage.close()
+        return self.open()
+
+
+# Firebase is replaced by an in-memory database; the write-ahead log and its sync thread are the real ones
+class FirebaseBackend:
+    def __init__(self, app, directory):
+        self.app = app
+        self.database = FakeDatabase()
+        self.path = os.path.join(directory, "parking_wal.jsonl")
+
+    def open(self):
+        journal = self.app.WriteAheadLog(self.database, self.path, "bench", retry_delay=0.05).start()
+        return self.app.FirebaseStorage(self.database, journal)
+
+    def reopen(self, storage):
+        storage.journal.flush()
+        storage.close()
+        return self.open()
+
+
+BACKENDS = {"memory": MemoryBackend, "sqlite": SQLiteBackend, "firebase": FirebaseBackend}
+
+
+def entry(time_text, slot):
+    return {"entry_time": time_text, "parking_slot": slot}
+
+
+def exit_record(entry_time, exit_time, slot, cost):
+    return {"entry_time": entry_time, "exit_time": exit_time, "parking_slot": slot, "total_cost": cost}
+
+
+# Conformance checks every backend has to pass; each returns an error message or None
+def check_fresh_load(app, backend, storage):
+    parked, free = storage.load()
+    if parked or free != app.all_parking_slots():
+        return f"fresh store loaded {parked}, {free}"
+
+
+def check_entry(app, backend, storage):
+    storage.load()
+    storage.record_entry("KA01AB1234", entry("2024-01-01 08:00:00", 2))
+    storage = backend.reopen(storage)
+    parked, free = storage.load()
+    if parked != {"KA01AB1234": entry("2024-01-01 08:00:00", 2)} or 2 in free:
+        return f"after an entry the store loaded {parked}, {free}"
+    if storage.entry_log("KA01AB1234") != entry("2024-01-01 08:00:00", 2):
+        return f"entry log is {storage.entry_log('KA01AB1234')}"
+
+
+def check_exit(app, backend, storage):
+    storage.load()
+    storage.record_entry("KA01AB1234", entry("2024-01-01 08:00:00", 2))
+    storage.record_exit("KA01AB1234", exit_record("2024-01-01 08:00:00", "2024-01-01 10:00:00", 2, 40.0))
+    storage = backend.reopen(storage)
+    parked, free = storage.load()
+    if parked or free != app.all_parking_slots():
+        return f"after an exit the store loaded {parked}, {free}"
+    latest = storage.exit_log("KA01AB1234")
+    expected = exit_record("2024-01-01 08:00:00", "2024-01-01 10:00:00", 2, 40.0)
+    if not latest or {key: latest[key] for key in expected} != expected or latest["vehicle_number"] != "KA01AB1234":
+        return f"exit log is {latest}"
+    if storage.entry_log("KA01AB1234") is None:
+        return "the entry log was dropped by the exit"
+
+
+def check_latest_exit(app, backend, storage):
+    storage.load()
+    for day, slot in ((1, 3), (2, 4)):
+        storage.record_entry("MH12XY0001", entry(f"2024-01-0{day} 08:00:00", slot))
+        storage.record_exit("MH12XY0001", exit_record(f"2024-01-0{day} 08:00:00", f"2024-01-0{day} 09:00:00",
+                                                      slot, 20.0))
+    storage = backend.reopen(storage)
+    latest = storage.exit_log("MH12XY0001")
+    if not latest or latest["exit_time"] != "2024-01-02 09:00:00":
+        return f"latest exit is {latest}"
+
+
+def check_exit_history(app, backend, storage):
+    storage.load()
+    for day in (1, 2, 3):
+        storage.record_entry("MH12XY0001", entry(f"2024-01-0{day} 08:00:00", 3))
+        storage.record_exit("MH12XY0001", exit_record(f"2024-01-0{day} 08:00:00", f"2024-01-0{day} 09:00:00", 3, 20.0))
+    storage = backend.reopen(storage)
+    history = storage.exit_history("MH12XY0001")
+    if [event["exit_time"][:10] for event in history] != ["2024-01-01", "2024-01-02", "2024-01-03"]:
+        return f"history kept {history}"
+    if len({event["event_id"] for event in history}) != 3:
+        return "exit events share an event id"
+
+
+def check_exits_between(app, backend, storage):
+    storage.load()
+    times = ["2024-01-01 23:59:59", "2024-01-02 00:00:00", "2024-01-02 12:30:00", "2024-01-03 00:00:00"]
+    for index, exit_time in enumerate(times):
+        plate = f"DL03CD000{index}"
+        storage.record_entry(plate, entry("2024-01-01 07:00:00", index + 1))
+        storage.record_exit(plate, exit_record("2024-01-01 07:00:00", exit_time, index + 1, 20.0))
+    storage = backend.reopen(storage)
+    events = storage.exits_between(datetime(2024, 1, 2), datetime(2024, 1, 3))
+    if [event["vehicle_number"] for event in events] != ["DL03CD0001", "DL03CD0002"]:
+        return f"exits on 2024-01-02 were {events}"
+
+
+def check_save_state(app, backend, storage):
+    storage.load()
+    parked = {"DL03CD5678": entry("2024-01-01 07:30:00", 5)}
+    storage.save_state(parked, {1, 2, 3, 4})
+    storage = backend.reopen(storage)
+    loaded = storage.load()
+    if loaded != (parked, {1, 2, 3, 4}):
+        return f"saved state loaded back as {loaded}"
+
+
+def check_unknown_vehicle(app, backend, storage):
+    storage.load()
+    if storage.entry_log("XX00XX0000") is not None or storage.exit_log("XX00XX0000") is not None:
+        return "logs returned data for a vehicle that never parked"
+    if storage.exit_history("XX00XX0000"):
+        return "history returned exits for a vehicle that never parked"
+
+
+CHECKS = [check_fresh_load, check_entry, check_exit, check_latest_exit, check_exit_history, check_exits_between,
+          check_save_state, check_unknown_vehicle]
+
+
+# Function to run every check against a fresh store of the given backend
+def run_conformance(app, name):
+    failures = 0
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as directory:
+            backend = BACKENDS[name](app, directory)
+            storage = backend.open()
+            try:
+                error = check(app, backend, storage)
+            except Exception as e:
+                error = f"raised {e!r}"
+            finally:
+                backend.reopen(storage).close()
+        print(f"  {'FAIL' if error else 'ok  '} {check.__name__}{': ' + error if error else ''}")
+        failures += bool(error)
+    return failures
+
+
+# Function to time entries, lookups, a full load and exits with the given number of vehicles
+def run_benchmark(app, name, vehicles):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        backend = BACKENDS[name](app, directory)
+        storage = backend.open()
+        storage.load()
+        plates = [f"KA{index % 100:02d}AB{index:04d}" for index in range(vehicles)]
+
+        latencies = []
+        for index, plate in enumerate(plates):
+            start = time.perf_counter()
+            storage.record_entry(plate, entry("2024-01-01 08:00:00", index + 1))
+            latencies.append(time.perf_counter() - start)
+        results["record_entry"] = summarise(latencies)
+
+        storage = backend.reopen(storage)
+        start = time.perf_counter()
+        storage.load()
+        results["load"] = summarise([time.perf_counter() - start])
+
+        if name != "firebase":  # Firebase log lookups are network reads, which the fake database cannot model
+            latencies = []
+            for plate in plates:
+                start = time.perf_counter()
+                storage.entry_log(plate)
+                latencies.append(time.perf_counter() - start)
+            results["entry_log"] = summarise(latencies)
+
+        latencies = []
+        for index, plate in enumerate(plates):
+            start = time.perf_counter()
+            storage.record_exit(plate, exit_record("2024-01-01 08:00:00", "2024-01-01 10:00:00", index + 1, 40.0))
+            latencies.append(time.perf_counter() - start)
+        results["record_exit"] = summarise(latencies)
+        backend.reopen(storage).close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conformance checks and benchmark for the storage backends")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--vehicles", type=int, default=2000)
+    args = parser.parse_args()
+    app = load_app()
+
+    failures = 0
+    for name in args.backends:
+        print(f"{name} conformance:")
+        failures += run_conformance(app, name)
+
+    print(f"\n{'backend':>9} {'operation':>13} {'mean ms':>9} {'p99 ms':>9} {'ops/s':>10}")
+    for name in args.backends:
+        for operation, summary in run_benchmark(app, name, args.vehicles).items():
+            print(f"{name:>9} {operation:>13} {summary['mean_ms']:>9.3f} {summary['p99_ms']:>9.3f} "
+                  f"{summary['per_second']:>10.0f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
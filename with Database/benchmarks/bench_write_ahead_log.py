@@ -0,0 +1,136 @@
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from _app import load_app, summarise
+from bench_save_data import FakeDatabase
+
+
+# Remote database with a slow, unreliable link: every patch takes a round trip, some fail before they reach
+# the database and some fail after it applied them (the reply was lost), and it can be switched offline
+class FlakyRemote:
+    def __init__(self, database, rtt, failure_rate, seed=0):
+        self.database = database
+        self.rtt = rtt
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.online = threading.Event()
+        self.online.set()
+        self.patches = 0
+
+    def child(self, *path):
+        return FlakyReference(self, self.database.child(*path))
+
+
+class FlakyReference:
+    def __init__(self, remote, reference):
+        self.remote = remote
+        self.reference = reference
+
+    def child(self, *path):
+        return FlakyReference(self.remote, self.reference.child(*path))
+
+    def get(self):
+        return self.reference.get()
+
+    def update(self, changes):
+        remote = self.remote
+        time.sleep(remote.rtt)
+        if not remote.online.is_set():
+            raise ConnectionError("network is unreachable")
+        outcome = remote.random.random()
+        if outcome < remote.failure_rate / 2:
+            raise ConnectionError("connection reset")
+        self.reference.update(changes)
+        remote.patches += 1
+        if outcome < remote.failure_rate:
+            raise TimeoutError("reply lost")
+
+
+# Function to build a parking system with no Tk window on top of the given write-ahead log
+def make_system(app, remote, journal, slots):
+    system = app.ParkingSystem.__new__(app.ParkingSystem)
+    system.storage = app.FirebaseStorage(remote, journal)
+    system.sessions = app.SessionIndex({}, range(1, slots + 1))
+    return system
+
+
+# Function to run random entries and exits and return the time each one took to be acknowledged
+def run_events(system, events, seed=0, prefix="KA01AB"):
+    rng = random.Random(seed)
+    clock = datetime(2024, 1, 1, 8, 0)
+    latencies = []
+    for index in range(events):
+        clock += timedelta(minutes=1)
+        start = time.perf_counter()
+        if system.sessions.parked_vehicles and (not system.sessions.available_parking_slots or rng.random() < 0.5):
+            vehicle_number = rng.choice(list(system.sessions.parked_vehicles))
+            entry = system.sessions.parked_vehicles[vehicle_number]
+            entry_time = datetime.strptime(entry["entry_time"], "%Y-%m-%d %H:%M:%S")
+            system.record_exit(vehicle_number, entry_time, clock, entry["parking_slot"], 20.0)
+        else:
+            parking_slot = rng.choice(list(system.sessions.available_parking_slots))
+            system.record_entry(f"{prefix}{index:04d}", clock, parking_slot)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# Function to check that the database ended up with exactly the local state
+def check_converged(app, database, system):
+    remote = database.tree.get("parking_data", {})
+    parked = remote.get("parked_vehicles", {})
+    slots = app.parse_slots(remote.get("available_parking_slots", {}))
+    return parked == system.sessions.parked_vehicles and slots == system.sessions.available_parking_slots
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI latency and sync behaviour of the write-ahead log")
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--slots", type=int, default=50)
+    parser.add_argument("--rtt-ms", type=float, default=50.0, help="modelled round trip per database write")
+    parser.add_argument("--failure-rate", type=float, default=0.2, help="share of patches that fail")
+    args = parser.parse_args()
+    app = load_app()
+    rtt = args.rtt_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "parking_wal.jsonl")
+
+        # Blocking writes: what the gate waited for before, one round trip per event on the Tk thread
+        print(f"blocking write per event: {summarise([rtt] * args.events)['mean_ms']:.2f} ms (modelled)")
+
+        # Logged writes: the event is acknowledged once it is fsynced locally
+        database = FakeDatabase()
+        remote = FlakyRemote(database, rtt, args.failure_rate)
+        journal = app.WriteAheadLog(remote, path, "bench", retry_delay=0.05).start()
+        system = make_system(app, remote, journal, args.slots)
+        system.save_data()
+        acknowledged = summarise(run_events(system, args.events))
+        print(f"logged write per event: mean {acknowledged['mean_ms']:.2f} ms, p99 {acknowledged['p99_ms']:.2f} ms")
+        print(f"sync lag right after the burst: {journal.stats()['lag_s']:.2f} s")
+
+        start = time.perf_counter()
+        journal.flush()
+        print(f"drained in {time.perf_counter() - start:.2f} s: {journal.stats()}, {remote.patches} patches applied")
+        print(f"database matches local state: {check_converged(app, database, system)}")
+
+        # Offline, then the terminal is restarted: the new log picks up the unsynced events from disk
+        remote.online.clear()
+        run_events(system, args.events // 3, seed=1, prefix="MH12XY")
+        journal.stop()
+        remote.online.set()
+        journal = app.WriteAheadLog(remote, path, "bench", retry_delay=0.05)
+        print(f"after an offline restart: {len(journal.pending)} events waiting in the log")
+        journal.start().flush()
+        journal.stop()
+        print(f"database matches local state after the restart: {check_converged(app, database, system)}")
+        counters = app.metrics.snapshot()["counters"]
+        print("sync metrics:", {name: value for name, value in counters.items() if name.startswith(("sync", "wal"))})
+
+
+if __name__ == "__main__":
+    main()
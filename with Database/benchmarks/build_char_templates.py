@@ -0,0 +1,91 @@
+import argparse
+import collections
+import os
+import time
+
+import cv2
+import numpy as np
+
+from _app import load_app
+from synthetic import render_frame
+
+
+# Function to load labeled plate crops named <PLATE>_<n>.jpg
+def load_labeled(directory):
+    for name in sorted(os.listdir(directory)):
+        crop = cv2.imread(os.path.join(directory, name))
+        if crop is not None:
+            yield crop, name.split("_")[0].upper()
+
+
+# Function to cut synthetic plates out of rendered frames with the real detection and rectification code
+def generate_synthetic(app, count, seed):
+    rng = np.random.default_rng(seed)
+    while count > 0:
+        frame, text, _ = render_frame(rng, plate_width=int(rng.integers(180, 420)), skew=0.3, noise=4)
+        candidates = app.find_plate_candidates(frame)
+        if candidates:
+            count -= 1
+            yield app.crop_plate(frame, candidates[0], copy=True), text
+
+
+# Function to time a plate reader and count how many plates it reads exactly
+def evaluate(name, read, samples):
+    correct = 0
+    start = time.perf_counter()
+    for crop, label in samples:
+        correct += read(crop) == label
+    elapsed = time.perf_counter() - start
+    print(f"{name:18s} accuracy {correct}/{len(samples)} ({correct / len(samples):.1%}), "
+          f"{1000 * elapsed / len(samples):.2f} ms per plate")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the character templates for the fast plate recognizer")
+    parser.add_argument("--labeled", help="directory of labeled plate crops named <PLATE>_<n>.jpg")
+    parser.add_argument("--synthetic", type=int, default=500, help="synthetic plates when no labeled set is given")
+    parser.add_argument("--per-class", type=int, default=40, help="templates kept per character")
+    parser.add_argument("--output", default="char_templates.npz")
+    parser.add_argument("--tesseract", action="store_true", help="also evaluate the tesseract-only baseline")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = load_app()
+    samples = list(load_labeled(args.labeled) if args.labeled else generate_synthetic(app, args.synthetic, args.seed))
+
+    # Every fifth plate is held out for the evaluation
+    train = [sample for index, sample in enumerate(samples) if index % 5]
+    test = [sample for index, sample in enumerate(samples) if not index % 5]
+
+    # Pair segmented characters with the label wherever the segmentation found every character
+    characters = collections.defaultdict(list)
+    for crop, label in train:
+        segments = app.segment_characters(crop)
+        if len(segments) == len(label):
+            for segment, character in zip(segments, label):
+                characters[character].append(segment)
+
+    rng = np.random.default_rng(args.seed)
+    templates, labels = [], []
+    for character, segments in sorted(characters.items()):
+        for index in rng.permutation(len(segments))[:args.per_class]:
+            templates.append(segments[index])
+            labels.append(character)
+    np.savez_compressed(args.output, templates=np.array(templates, dtype=np.uint8), labels=np.array(labels))
+    print(f"saved {len(templates)} templates for {len(characters)} characters to {args.output}")
+
+    # Accuracy and latency on the held-out plates
+    classifier = app.CharClassifier(np.array(templates), labels)
+    confident = [(crop, label) for crop, label in test
+                 if classifier.read_plate(crop)[1] >= app.FAST_OCR_CONFIDENCE]
+    print(f"fast path confident on {len(confident)}/{len(test)} plates "
+          f"(threshold {app.FAST_OCR_CONFIDENCE}), the rest fall back to tesseract")
+    evaluate("fast path (all)", lambda crop: classifier.read_plate(crop)[0], test)
+    if confident:
+        evaluate("fast path (sure)", lambda crop: classifier.read_plate(crop)[0], confident)
+    if args.tesseract:
+        evaluate("tesseract only", app.extract_text_from_image, test)
+
+
+if __name__ == "__main__":
+    main()
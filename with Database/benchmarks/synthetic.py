@@ -0,0 +1,72 @@
+import string
+
+import cv2
+import numpy as np
+
+# Size of a rendered plate before it is placed in a frame (about the 500 x 120 mm proportions of Indian plates)
+PLATE_SIZE = (520, 120)
+
+
+# Function to generate a random Indian-format plate number, e.g. KA01AB1234
+def random_plate_number(rng):
+    letters = string.ascii_uppercase
+    series = ''.join(rng.choice(list(letters), size=rng.choice((1, 2))))
+    return (''.join(rng.choice(list(letters), size=2)) + f"{rng.integers(100):02d}" + series
+            + f"{rng.integers(10000):04d}")
+
+
+# Function to render a flat plate: black text on white with a dark border
+def render_plate(text, size=PLATE_SIZE):
+    width, height = size
+    plate = np.full((height, width, 3), 245, dtype=np.uint8)
+    cv2.rectangle(plate, (0, 0), (width - 1, height - 1), (20, 20, 20), 8)
+
+    # Scale the text to fill most of the plate
+    font = cv2.FONT_HERSHEY_DUPLEX
+    (text_width, text_height), _ = cv2.getTextSize(text, font, 1.0, 2)
+    font_scale = min(0.85 * width / text_width, 0.6 * height / text_height)
+    (text_width, text_height), _ = cv2.getTextSize(text, font, font_scale, 3)
+    origin = ((width - text_width) // 2, (height + text_height) // 2)
+    cv2.putText(plate, text, origin, font, font_scale, (15, 15, 15), 3, cv2.LINE_AA)
+    return plate
+
+
+# Function to render a camera frame with one plate; returns the frame, the plate number and its corners
+def render_frame(rng, text=None, frame_size=(1280, 720), plate_width=300, skew=0.0, noise=0.0, clutter=0):
+    text = text or random_plate_number(rng)
+    frame_width, frame_height = frame_size
+
+    # Smooth background with some large-scale shading
+    background = rng.integers(60, 140, (frame_height // 40 + 1, frame_width // 40 + 1), dtype=np.uint8)
+    frame = cv2.cvtColor(cv2.resize(background, frame_size, interpolation=cv2.INTER_CUBIC), cv2.COLOR_GRAY2BGR)
+
+    # Clutter: rectangles and lines like signage, bumpers and parking bay markings
+    for _ in range(clutter):
+        x, y = int(rng.integers(0, frame_width)), int(rng.integers(0, frame_height))
+        w, h = int(rng.integers(10, 200)), int(rng.integers(10, 120))
+        color = tuple(int(value) for value in rng.integers(0, 255, 3))
+        if rng.random() < 0.5:
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, int(rng.integers(1, 4)))
+        else:
+            cv2.line(frame, (x, y), (x + w, y + h), color, int(rng.integers(1, 4)))
+
+    # Place the plate with its corners jittered by the skew factor (a perspective view of the plate)
+    plate = render_plate(text)
+    plate_height = plate_width * PLATE_SIZE[1] / PLATE_SIZE[0]
+    left = rng.uniform(0.1 * frame_width, 0.9 * frame_width - plate_width)
+    top = rng.uniform(0.3 * frame_height, 0.9 * frame_height - plate_height)
+    corners = np.array([[left, top], [left + plate_width, top],
+                        [left + plate_width, top + plate_height], [left, top + plate_height]], dtype=np.float32)
+    corners += rng.uniform(-skew, skew, corners.shape).astype(np.float32) * plate_height
+
+    source = np.array([[0, 0], [PLATE_SIZE[0], 0], PLATE_SIZE, [0, PLATE_SIZE[1]]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(source, corners)
+    warped = cv2.warpPerspective(plate, matrix, frame_size)
+    mask = cv2.warpPerspective(np.full(plate.shape[:2], 255, dtype=np.uint8), matrix, frame_size)
+    frame[mask > 0] = warped[mask > 0]
+
+    # Sensor noise
+    if noise:
+        frame = np.clip(frame + rng.normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+
+    return frame, text, corners
@@ -1,21 +1,141 @@
 import cv2
+import numpy as np
 import pytesseract
 import re
 import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime, timedelta
 import random
+import threading
+import time
+import collections
+import concurrent.futures
+import argparse
+import glob
+import itertools
+import functools
+import bisect
+import contextlib
+import http.server
+import json
+import sys
+import socket
+import sqlite3
+import uuid
+import queue
 import pyrebase
 
 from dotenv import load_dotenv
 import os
 
+# tesserocr keeps a tesseract engine resident in-process; fall back to pytesseract when it is not installed
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
 # Load environment variables from the .env file
 load_dotenv()
 
 
 # Set the path to the Tesseract OCR executable (change this according to your installation)
-pytesseract.pytesseract.tesseract_cmd = '/opt/homebrew/bin/tesseract'
+pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_CMD") or '/opt/homebrew/bin/tesseract'
+
+# Tesseract language and optional tessdata directory for the persistent OCR engine
+OCR_LANG = os.getenv("OCR_LANG") or "eng"
+TESSDATA_PATH = os.getenv("TESSDATA_PATH")
+
+# Directory for optional plate snapshots (leave unset to keep the OCR path entirely in memory), and the
+# number of snapshots that may wait for the disk before new ones are dropped
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR")
+SNAPSHOT_QUEUE_SIZE = int(os.getenv("SNAPSHOT_QUEUE_SIZE") or 32)
+
+# Camera index or recorded video file used for plate capture
+CAMERA_SOURCE = os.getenv("CAMERA_SOURCE") or "0"
+
+# Frames discarded after a camera is opened while auto-exposure settles, the first delay before
+# reopening a camera that stopped delivering frames (doubled on every failed attempt, up to 10 seconds),
+# and the seconds between frames grabbed from a warm camera while no capture is running
+CAMERA_WARMUP_FRAMES = int(os.getenv("CAMERA_WARMUP_FRAMES") or 10)
+CAMERA_RECONNECT_DELAY = float(os.getenv("CAMERA_RECONNECT_DELAY") or 0.5)
+CAMERA_IDLE_INTERVAL = float(os.getenv("CAMERA_IDLE_INTERVAL") or 0.2)
+
+# Number of threads that OCR plate candidates in parallel (defaults to one per CPU core)
+OCR_WORKERS = int(os.getenv("OCR_WORKERS") or os.cpu_count() or 1)
+
+# Number of plate reads combined into one consensus read (1 keeps the first valid read) and the
+# per-character agreement at which the consensus is accepted early
+CONSENSUS_FRAMES = int(os.getenv("CONSENSUS_FRAMES") or 1)
+CONSENSUS_THRESHOLD = float(os.getenv("CONSENSUS_THRESHOLD") or 0.8)
+
+# Motion gate in front of the recognition pipeline: share of changed pixels that counts as activity,
+# frames the pipeline keeps running after the gate goes quiet, and an optional gate region "x,y,w,h"
+MOTION_GATE = os.getenv("MOTION_GATE") != "0"
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD") or 0.01)
+MOTION_HOLD_FRAMES = int(os.getenv("MOTION_HOLD_FRAMES") or 15)
+GATE_REGION = os.getenv("GATE_REGION")
+
+# Indian number plate format, and the characters OCR may return for a plate
+PLATE_PATTERN = re.compile(r'^[A-Za-z]{2}\s?\d{2}\s?[A-Za-z]{1,2}\s?\d{4}$')
+PLATE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+# Plate candidates are warped to this canonical size before OCR (Indian plates are about 500 x 120 mm);
+# RECTIFY_PLATES=0 crops the axis-aligned bounding box instead
+RECTIFY_PLATES = os.getenv("RECTIFY_PLATES") != "0"
+PLATE_WIDTH, PLATE_HEIGHT = 260, 60
+
+# Optional character template set for the fast recognizer (built with benchmarks/build_char_templates.py),
+# the size characters are normalized to, and the correlation below which tesseract reads the plate instead
+CHAR_TEMPLATES = os.getenv("CHAR_TEMPLATES")
+CHAR_SIZE = (20, 32)
+FAST_OCR_CONFIDENCE = float(os.getenv("FAST_OCR_CONFIDENCE") or 0.85)
+
+# Plate detection runs on a copy of the frame scaled by this factor (1.0 detects at full resolution),
+# and candidate contours must enclose at least this many full-resolution pixels
+DETECTION_SCALE = float(os.getenv("DETECTION_SCALE") or 1.0)
+MIN_PLATE_AREA = int(os.getenv("MIN_PLATE_AREA") or 1000)
+
+# Plate tracking between frames: frames a track may miss before it is lost, and frames after which a
+# full-frame search is forced again
+TRACKING = os.getenv("TRACKING") != "0"
+TRACK_MAX_MISSES = int(os.getenv("TRACK_MAX_MISSES") or 3)
+TRACK_REFRESH_FRAMES = int(os.getenv("TRACK_REFRESH_FRAMES") or 30)
+
+# OCR result cache: entries kept (0 disables it), bits two crop hashes may differ by and still count as
+# the same crop, and seconds a cached read stays valid
+OCR_CACHE_SIZE = int(os.getenv("OCR_CACHE_SIZE") or 256)
+OCR_CACHE_DISTANCE = int(os.getenv("OCR_CACHE_DISTANCE") or 4)
+OCR_CACHE_TTL = float(os.getenv("OCR_CACHE_TTL") or 10)
+
+# Run the recognition loop without any display calls (kiosks without a monitor), or cap the preview rate
+HEADLESS = os.getenv("HEADLESS") == "1"
+PREVIEW_FPS = float(os.getenv("PREVIEW_FPS") or 5)
+
+# Latency budget and frame limit for one plate capture
+CAPTURE_BUDGET_SECONDS = float(os.getenv("CAPTURE_BUDGET_SECONDS") or 15)
+CAPTURE_MAX_FRAMES = int(os.getenv("CAPTURE_MAX_FRAMES") or 300)
+
+# Seconds during which a lane does not report the same plate again
+LANE_REPEAT_SECONDS = float(os.getenv("LANE_REPEAT_SECONDS") or 30)
+
+# Port of the local metrics endpoint (unset keeps it off)
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+# Storage backend for the parking state and logs (firebase, sqlite or memory), the SQLite database file, and
+# the number of parking slots in the lot
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND") or "firebase"
+SQLITE_PATH = os.getenv("SQLITE_PATH") or "parking.db"
+PARKING_SLOTS = int(os.getenv("PARKING_SLOTS") or 5)
+
+# Size of the exit history partitions ("day" or "hour")
+EXIT_PARTITION = os.getenv("EXIT_PARTITION") or "day"
+
+# Local write-ahead log of parking events, the name this terminal records its sync progress under, events
+# sent to the database per batch, and the first delay before retrying a failed sync (doubled up to a minute)
+WAL_PATH = os.getenv("WAL_PATH") or "parking_wal.jsonl"
+TERMINAL_ID = os.getenv("TERMINAL_ID") or socket.gethostname()
+SYNC_BATCH_SIZE = int(os.getenv("SYNC_BATCH_SIZE") or 50)
+SYNC_RETRY_DELAY = float(os.getenv("SYNC_RETRY_DELAY") or 1)
 
 # Firebase configuration
 config = {
@@ -30,8 +150,781 @@ config = {
 firebase = pyrebase.initialize_app(config)
 db = firebase.database()
 
+# Low-overhead stage timers and counters; every stage keeps cumulative Prometheus buckets plus a rolling
+# window of recent samples for percentiles
+class Metrics:
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.lock = threading.Lock()
+        self.counters = collections.defaultdict(float)
+        self.gauges = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1):
+        with self.lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name, value):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0,
+                                                      "recent": collections.deque(maxlen=self.window)}
+            index = bisect.bisect_left(self.BUCKETS, seconds)
+            if index < len(self.BUCKETS):
+                histogram["buckets"][index] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            histogram["recent"].append(seconds)
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self.lock:
+            stages = {}
+            for stage, histogram in self.histograms.items():
+                recent = sorted(histogram["recent"])
+                stages[stage] = {"count": histogram["count"], "sum_s": round(histogram["sum"], 6)}
+                for quantile in (0.5, 0.9, 0.99):
+                    stages[stage][f"p{int(quantile * 100)}_ms"] = round(
+                        1000 * recent[min(len(recent) - 1, int(len(recent) * quantile))], 3)
+            return {"counters": dict(self.counters), "gauges": dict(self.gauges), "stages": stages}
+
+    def prometheus(self):
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE parking_{name}_total counter", f"parking_{name}_total {value:g}"]
+            for name, value in sorted(self.gauges.items()):
+                lines += [f"# TYPE parking_{name} gauge", f"parking_{name} {value:g}"]
+
+            lines.append("# TYPE parking_stage_seconds histogram")
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                    cumulative += count
+                    lines.append(f'parking_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'parking_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'parking_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'parking_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    # Take everything recorded since the last drain and start again from zero (a batch worker sends this
+    # back to the parent process with every frame)
+    def drain(self):
+        with self.lock:
+            recorded = {"counters": dict(self.counters), "gauges": self.gauges,
+                        "histograms": {stage: {**histogram, "recent": list(histogram["recent"])}
+                                       for stage, histogram in self.histograms.items()}}
+            self.counters.clear()
+            self.gauges = {}
+            self.histograms = {}
+            return recorded
+
+    # Add what another process drained to this registry
+    def merge(self, recorded):
+        with self.lock:
+            for name, value in recorded["counters"].items():
+                self.counters[name] += value
+            self.gauges.update(recorded["gauges"])
+            for stage, other in recorded["histograms"].items():
+                histogram = self.histograms.get(stage)
+                if histogram is None:
+                    histogram = self.histograms[stage] = {"buckets": [0] * len(self.BUCKETS), "sum": 0.0,
+                                                          "count": 0, "recent": collections.deque(maxlen=self.window)}
+                histogram["buckets"] = [mine + theirs for mine, theirs in zip(histogram["buckets"], other["buckets"])]
+                histogram["sum"] += other["sum"]
+                histogram["count"] += other["count"]
+                histogram["recent"].extend(other["recent"])
+
+metrics = Metrics()
+
+# Function to apply a multi-path patch ({"a/b": value}, None deletes) to a nested dict
+def apply_changes(data, changes):
+    for path, value in changes.items():
+        *parents, key = path.split("/")
+        node = data
+        for parent in parents:
+            child = node.get(parent)
+            if not isinstance(child, dict):
+                child = node[parent] = {}
+            node = child
+        if value is None:
+            node.pop(key, None)
+        else:
+            node[key] = value
+    return data
+
+# Function to list the ancestors of a database path ("a/b/c" -> "a", "a/b")
+def path_ancestors(path):
+    keys = path.split("/")
+    return ["/".join(keys[:index]) for index in range(1, len(keys))]
+
+# Function to find the HTTP status behind a failed database request (pyrebase wraps the requests error)
+def http_status(error):
+    for candidate in (error, *getattr(error, "args", ())):
+        response = getattr(candidate, "response", None)
+        if response is not None:
+            return getattr(response, "status_code", None)
+    return None
+
+# Durable local log of parking events: every change is fsynced to disk before the UI moves on, and a
+# background thread replays the log to the remote database in batches, retrying until it gets through
+class WriteAheadLog:
+    def __init__(self, remote, path=WAL_PATH, terminal=TERMINAL_ID, batch_size=SYNC_BATCH_SIZE,
+                 retry_delay=SYNC_RETRY_DELAY, root="parking_data"):
+        # pyrebase builds each request path on the database object, so the sync thread needs its own
+        self.remote = remote
+        self.root = root  # Node the multi-path patches are applied below
+        self.path = path
+        self.checkpoint_path = path + ".synced"
+        self.terminal = terminal
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+        self.condition = threading.Condition()
+        self.pending = collections.deque()  # (record, end offset in the log) not yet synced
+        self.running = False
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.synced = 0
+        self.failures = 0
+
+        # Pick up the events a previous run logged but did not sync, dropping a line torn by a crash
+        offset = 0
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as checkpoint:
+                offset = int(checkpoint.read() or 0)
+        if os.path.exists(path):
+            # A checkpoint past the end belongs to a log that was truncated since, so read it from the start
+            if offset > os.path.getsize(path):
+                offset = 0
+            with open(path, "r+b") as log:
+                log.seek(offset)
+                for line in iter(log.readline, b""):
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        log.truncate(offset)
+                        break
+                    offset += len(line)
+                    self.pending.append((record, offset))
+        self.file = open(path, "ab")
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+        return self
+
+    def append(self, changes):
+        # Each event carries a unique id, so the remote side can tell which events it already applied
+        record = {"id": uuid.uuid4().hex, "time": time.time(), "changes": changes}
+        line = (json.dumps(record) + "\n").encode()
+        with self.condition:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending.append((record, self.file.tell()))
+            self._update_lag()
+            self.condition.notify_all()
+        metrics.inc("wal_appends")
+        return record["id"]
+
+    def replay(self, data):
+        # Apply the events that have not reached the database yet on top of a state loaded from it
+        with self.condition:
+            for record, _ in self.pending:
+                apply_changes(data, record["changes"])
+        return data
+
+    def _update_lag(self):
+        # Age of the oldest event the database has not seen yet
+        lag = time.time() - self.pending[0][0]["time"] if self.pending else 0.0
+        metrics.set_gauge("sync_lag_seconds", lag)
+        metrics.set_gauge("sync_pending", len(self.pending))
+        return lag
+
+    def _skip_applied(self):
+        # After a crash between a sync and its checkpoint, skip the events the database already applied
+        try:
+            last_event = self.remote.child(self.root).child("sync_state").child(self.terminal).child(
+                "last_event").get().val()
+        except Exception as e:
+            print("Error reading sync state:", str(e))
+            return
+        with self.condition:
+            ids = [record["id"] for record, _ in self.pending]
+            if last_event in ids:
+                for _ in range(ids.index(last_event) + 1):
+                    _, offset = self.pending.popleft()
+                self._checkpoint(offset)
+
+    def _checkpoint(self, offset):
+        # Once everything is synced the log starts over; otherwise remember how far it has been synced. The
+        # checkpoint is reset before the log is truncated: a crash in between then replays synced events,
+        # which _skip_applied recognises, instead of skipping new events behind a stale offset
+        if not self.pending:
+            offset = 0
+        with open(self.checkpoint_path + ".tmp", "w") as checkpoint:
+            checkpoint.write(str(offset))
+        os.replace(self.checkpoint_path + ".tmp", self.checkpoint_path)
+        if not self.pending:
+            self.file.truncate(0)
+
+    def _sync_loop(self):
+        if self.pending:
+            self._skip_applied()
+
+        delay = self.retry_delay
+        batch_size = self.batch_size
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending or not self.running)
+                if not self.running:
+                    break
+                batch, changes = self._next_batch(batch_size)
+            changes[f"sync_state/{self.terminal}/last_event"] = batch[-1][0]["id"]
+
+            try:
+                with metrics.timer("db_sync"):
+                    self.remote.child(self.root).update(changes)
+                metrics.inc("db_round_trips")
+                metrics.inc("db_bytes_written", len(json.dumps(changes)))
+            except Exception as e:
+                self.failures += 1
+                metrics.inc("sync_failures")
+                status = http_status(e)
+                if status and 400 <= status < 500 and status not in (408, 429):
+                    # The database refused the patch itself, so retrying it cannot help: narrow the batch down
+                    # to the event it refuses and set that one aside
+                    if len(batch) > 1:
+                        batch_size = 1
+                        continue
+                    print(f"Database rejected event {batch[0][0]['id']} ({status}), moving it aside:", str(e))
+                    self._reject(batch[0])
+                    continue
+
+                print(f"Error syncing {len(batch)} events, retrying in {delay:.0f}s:", str(e))
+                with self.condition:
+                    self._update_lag()
+                    self.condition.wait_for(lambda: not self.running, delay)
+                delay = min(delay * 2, 60)
+                continue
+
+            delay = self.retry_delay
+            batch_size = self.batch_size
+            self._acknowledge(batch)
+            self.synced += len(batch)
+            metrics.inc("sync_events", len(batch))
+
+    def _next_batch(self, limit):
+        # Merge consecutive events into one patch, later events winning on equal paths. Firebase rejects a
+        # patch in which one path lies below another, so the batch ends before an event that would do that
+        batch, changes, ancestors = [], {}, set()
+        for record, offset in itertools.islice(self.pending, limit):
+            paths = list(record["changes"])
+            if batch and any(path in ancestors or any(parent in changes for parent in path_ancestors(path))
+                             for path in paths):
+                break
+            batch.append((record, offset))
+            changes.update(record["changes"])
+            for path in paths:
+                ancestors.update(path_ancestors(path))
+        return batch, changes
+
+    def _acknowledge(self, batch):
+        with self.condition:
+            for _ in batch:
+                self.pending.popleft()
+            self._checkpoint(batch[-1][1])
+            self._update_lag()
+            self.condition.notify_all()
+
+    def _reject(self, item):
+        # Keep the refused event next to the log for inspection instead of blocking every later event
+        with open(self.path + ".rejected", "a") as rejected:
+            rejected.write(json.dumps(item[0]) + "\n")
+        metrics.inc("sync_rejected")
+        self._acknowledge([item])
+
+    def stats(self):
+        with self.condition:
+            return {"pending": len(self.pending), "synced": self.synced, "failures": self.failures,
+                    "lag_s": round(self._update_lag(), 3)}
+
+    def flush(self, timeout=None):
+        # Wait until every logged event has reached the database
+        with self.condition:
+            return self.condition.wait_for(lambda: not self.pending, timeout)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.file.close()
+
+# Function to read the free slots, stored as a {slot: true} map (which Firebase returns as a list when the
+# slot numbers are dense) or, in older data, as a list of slot numbers
+def parse_slots(slots):
+    if isinstance(slots, dict):
+        return {int(slot) for slot, free in slots.items() if free}
+    if any(isinstance(free, bool) for free in slots):
+        return {slot for slot, free in enumerate(slots) if free}
+    return {slot for slot in slots if slot is not None}
+
+# Function to list the slots of the lot
+def all_parking_slots():
+    return set(range(1, PARKING_SLOTS + 1))
+
+# Function to name the exit history partition a time ("%Y-%m-%d %H:%M:%S" text or datetime) falls in
+def exit_partition(exit_time):
+    if isinstance(exit_time, str):
+        exit_time = datetime.strptime(exit_time, "%Y-%m-%d %H:%M:%S")
+    return exit_time.strftime("%Y-%m-%dT%H" if EXIT_PARTITION == "hour" else "%Y-%m-%d")
+
+# Function to list the partitions a time range [start, end) covers
+def exit_partitions(start, end):
+    if EXIT_PARTITION == "hour":
+        current, step = start.replace(minute=0, second=0, microsecond=0), timedelta(hours=1)
+    else:
+        current, step = start.replace(hour=0, minute=0, second=0, microsecond=0), timedelta(days=1)
+    partitions = []
+    while current < end:
+        partitions.append(exit_partition(current))
+        current += step
+    return partitions
+
+# Function to make a unique exit event id that sorts by exit time
+def exit_event_id(exit_time):
+    return re.sub(r'[^0-9]', '', exit_time) + "-" + uuid.uuid4().hex[:12]
+
+# Function to keep the exits in [start, end) ordered by exit time
+def select_exits(events, start, end):
+    start, end = start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
+    return sorted((event for event in events if start <= event["exit_time"] < end),
+                  key=lambda event: (event["exit_time"], event["event_id"]))
+
+# Storage backends. Each one provides the same operations:
+#   load() -> (parked vehicles, free slots)      save_state(parked vehicles, free slots)
+#   record_entry(vehicle number, entry data)     record_exit(vehicle number, exit data)
+#   entry_log(vehicle number)                    exit_log(vehicle number) -> latest logged entry / exit or None
+#   exit_history(vehicle number)                 exits_between(start, end) -> exits ordered by exit time
+#   watch(session index) -> keep the index current with changes made by other terminals
+#   close()
+
+# Firebase backend: state and logs live under parking_data, and every change goes through the write-ahead log
+class FirebaseStorage:
+    def __init__(self, database, journal):
+        self.database = database
+        self.journal = journal
+        self.streams = []
+
+    def load(self):
+        try:
+            with metrics.timer("db_load_data"):
+                data = self.database.child("parking_data").get().val()
+            metrics.inc("db_round_trips")
+            initialize = not data  # Initialize data if it doesn't exist
+        except Exception as e:
+            # Keep working offline from the local log; the database catches up once it is reachable
+            print("Error loading data:", str(e))
+            data, initialize = {}, False
+
+        # Older data keeps the free slots as a list of slot numbers; rewrite it once as a slot map so single
+        # slots can be patched
+        data = dict(data or {})
+        slots = data.get('available_parking_slots')
+        legacy = isinstance(slots, list) and not any(isinstance(free, bool) for free in slots)
+        if slots is not None:
+            data['available_parking_slots'] = {str(slot): True for slot in parse_slots(slots)}
+
+        # Add the events that are logged locally but have not reached the database yet
+        self.journal.replay(data)
+        parked_vehicles = data.get('parked_vehicles') or {}
+
+        # Firebase drops the slot map once every slot is taken
+        slots = data.get('available_parking_slots')
+        if slots is None:
+            slots = all_parking_slots() - {entry["parking_slot"] for entry in parked_vehicles.values()}
+        available_parking_slots = parse_slots(slots)
+
+        if initialize or legacy:
+            self.save_state(parked_vehicles, available_parking_slots)
+        return parked_vehicles, available_parking_slots
+
+    def save_state(self, parked_vehicles, available_parking_slots):
+        # Rewrite the parked vehicles and free slots, leaving the entry and exit logs untouched
+        self.save_changes({'parked_vehicles': parked_vehicles,
+                           'available_parking_slots': {str(slot): True for slot in available_parking_slots}},
+                          "db_save_data")
+
+    def record_entry(self, vehicle_number, entry_data):
+        self.save_changes({
+            f"entry_logs/{vehicle_number}": entry_data,
+            f"parked_vehicles/{vehicle_number}": entry_data,
+            f"available_parking_slots/{entry_data['parking_slot']}": None,
+        }, "db_record_entry")
+
+    def record_exit(self, vehicle_number, exit_data):
+        # Exits are appended to the partition of their exit time under a unique event id (fixed before the
+        # event is logged, so a replayed sync writes the same event again), with a pointer in the vehicle's index
+        event_id = exit_event_id(exit_data["exit_time"])
+        partition = exit_partition(exit_data["exit_time"])
+        self.save_changes({
+            f"exit_history/{partition}/{event_id}": dict(exit_data, vehicle_number=vehicle_number),
+            f"exit_index/{vehicle_number}/{event_id}": partition,
+            f"parked_vehicles/{vehicle_number}": None,
+            f"available_parking_slots/{exit_data['parking_slot']}": True,
+        }, "db_record_exit")
+
+    def save_changes(self, changes, stage="db_save_changes"):
+        # Log one multi-path patch below parking_data, so each event only writes the paths it changed; the
+        # event is durable once logged and reaches the database in the background
+        with metrics.timer(stage):
+            self.journal.append(changes)
+
+    def entry_log(self, vehicle_number):
+        return self._get("entry_logs", vehicle_number)
+
+    def exit_log(self, vehicle_number):
+        # The vehicle's index is small, so only its newest event is read from the history
+        index = self._get("exit_index", vehicle_number) or {}
+        if not index:
+            return None
+        event_id = max(index)
+        event = self._get("exit_history", index[event_id], event_id)
+        return dict(event, event_id=event_id) if event else None
+
+    def exit_history(self, vehicle_number):
+        # One read per visit of the vehicle, however long the history of the lot is
+        events = []
+        for event_id, partition in sorted((self._get("exit_index", vehicle_number) or {}).items()):
+            event = self._get("exit_history", partition, event_id)
+            if event:
+                events.append(dict(event, event_id=event_id))
+        return events
+
+    def exits_between(self, start, end):
+        # Only the partitions the range covers are read
+        events = []
+        for partition in exit_partitions(start, end):
+            partition_events = self._get("exit_history", partition) or {}
+            events += [dict(event, event_id=event_id) for event_id, event in partition_events.items()]
+        return select_exits(events, start, end)
+
+    def _get(self, log, *path):
+        try:
+            node = self.database.child("parking_data").child(log)
+            for key in path:
+                node = node.child(key)
+            with metrics.timer(f"db_{log}"):
+                value = node.get().val()
+            metrics.inc("db_round_trips")
+            return value
+        except Exception as e:
+            print(f"Error loading {log}:", str(e))
+            return None
+
+    def watch(self, sessions):
+        # Follow the parked vehicles and free slots through the database's change stream; every terminal
+        # applies the same events, so they converge without polling or reloading
+        for node in ("parked_vehicles", "available_parking_slots"):
+            handler = functools.partial(self._on_stream_event, sessions, node)
+            self.streams.append(self.database.child("parking_data").child(node).stream(handler))
+
+    def _on_stream_event(self, sessions, node, message):
+        for path, data in stream_changes(message):
+            if not path:
+                # The whole node (sent when the stream opens or reconnects): keep the events this terminal
+                # logged but has not synced yet on top of it
+                if node == "available_parking_slots" and data is not None:
+                    data = {str(slot): True for slot in parse_slots(data)}
+                data = self.journal.replay({node: data or {}}).get(node)
+            sessions.apply_remote(node, path, data)
+
+    def close(self):
+        # Unsynced events stay in the log for the next start
+        for stream in self.streams:
+            stream.close()
+        self.journal.stop()
+
+# SQLite backend for a single-site lot: one local database file in WAL mode, so reads never wait for the
+# writer and a commit is a sequential log append
+class SQLiteStorage:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS parked_vehicles (
+            vehicle_number TEXT PRIMARY KEY,
+            entry_time TEXT NOT NULL,
+            parking_slot INTEGER NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS slots (
+            slot INTEGER PRIMARY KEY,
+            free INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS entry_logs (
+            vehicle_number TEXT PRIMARY KEY,
+            entry_time TEXT NOT NULL,
+            parking_slot INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS exit_logs (
+            id INTEGER PRIMARY KEY,
+            vehicle_number TEXT NOT NULL,
+            entry_time TEXT NOT NULL,
+            exit_time TEXT NOT NULL,
+            parking_slot INTEGER NOT NULL,
+            total_cost REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS exit_logs_vehicle ON exit_logs (vehicle_number, exit_time);
+        CREATE INDEX IF NOT EXISTS exit_logs_time ON exit_logs (exit_time);
+    """
+    EXIT_COLUMNS = "COALESCE(event_id, id), vehicle_number, entry_time, exit_time, parking_slot, total_cost"
+    EXIT_FIELDS = ("event_id", "vehicle_number", "entry_time", "exit_time", "parking_slot", "total_cost")
+
+    def __init__(self, path=SQLITE_PATH):
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(self.SCHEMA)
+
+        # Exit logs written before event ids existed keep their row id as event id
+        columns = [column[1] for column in self.connection.execute("PRAGMA table_info(exit_logs)")]
+        if "event_id" not in columns:
+            self.connection.execute("ALTER TABLE exit_logs ADD COLUMN event_id TEXT")
+        self.connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS exit_logs_event ON exit_logs (event_id)")
+
+    def load(self):
+        with self.lock, self.connection:
+            # Initialize data if it doesn't exist
+            if self.connection.execute("SELECT COUNT(*) FROM slots").fetchone()[0] == 0:
+                self.connection.executemany("INSERT INTO slots VALUES (?, 1)",
+                                            [(slot,) for slot in sorted(all_parking_slots())])
+            rows = self.connection.execute("SELECT vehicle_number, entry_time, parking_slot FROM parked_vehicles")
+            parked_vehicles = {vehicle_number: {"entry_time": entry_time, "parking_slot": parking_slot}
+                               for vehicle_number, entry_time, parking_slot in rows}
+            available_parking_slots = {slot for slot, in self.connection.execute(
+                "SELECT slot FROM slots WHERE free = 1")}
+        return parked_vehicles, available_parking_slots
+
+    def save_state(self, parked_vehicles, available_parking_slots):
+        taken = {entry["parking_slot"] for entry in parked_vehicles.values()}
+        with metrics.timer("db_save_data"), self.lock, self.connection:
+            self.connection.execute("DELETE FROM parked_vehicles")
+            self.connection.executemany("INSERT INTO parked_vehicles VALUES (?, ?, ?)", [
+                (vehicle_number, entry["entry_time"], entry["parking_slot"])
+                for vehicle_number, entry in parked_vehicles.items()])
+            self.connection.execute("DELETE FROM slots")
+            self.connection.executemany("INSERT INTO slots VALUES (?, ?)", [
+                (slot, int(slot in available_parking_slots)) for slot in sorted(taken | set(available_parking_slots))])
+
+    def record_entry(self, vehicle_number, entry_data):
+        row = (vehicle_number, entry_data["entry_time"], entry_data["parking_slot"])
+        with metrics.timer("db_record_entry"), self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO entry_logs VALUES (?, ?, ?)", row)
+            self.connection.execute("INSERT OR REPLACE INTO parked_vehicles VALUES (?, ?, ?)", row)
+            self.connection.execute("INSERT OR REPLACE INTO slots VALUES (?, 0)", (entry_data["parking_slot"],))
+
+    def record_exit(self, vehicle_number, exit_data):
+        with metrics.timer("db_record_exit"), self.lock, self.connection:
+            # Exit logs are append-only; the exit_time index serves range queries like time partitions would
+            self.connection.execute(
+                "INSERT INTO exit_logs (event_id, vehicle_number, entry_time, exit_time, parking_slot, total_cost) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (exit_event_id(exit_data["exit_time"]), vehicle_number,
+                                              exit_data["entry_time"], exit_data["exit_time"],
+                                              exit_data["parking_slot"], exit_data["total_cost"]))
+            self.connection.execute("DELETE FROM parked_vehicles WHERE vehicle_number = ?", (vehicle_number,))
+            self.connection.execute("INSERT OR REPLACE INTO slots VALUES (?, 1)", (exit_data["parking_slot"],))
+
+    def entry_log(self, vehicle_number):
+        with self.lock:
+            row = self.connection.execute("SELECT entry_time, parking_slot FROM entry_logs WHERE vehicle_number = ?",
+                                          (vehicle_number,)).fetchone()
+        return {"entry_time": row[0], "parking_slot": row[1]} if row else None
+
+    def exit_log(self, vehicle_number):
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {self.EXIT_COLUMNS} FROM exit_logs WHERE vehicle_number = ? "
+                "ORDER BY exit_time DESC, id DESC LIMIT 1", (vehicle_number,)).fetchone()
+        return dict(zip(self.EXIT_FIELDS, row)) if row else None
+
+    def exit_history(self, vehicle_number):
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {self.EXIT_COLUMNS} FROM exit_logs WHERE vehicle_number = ? ORDER BY exit_time, id",
+                (vehicle_number,)).fetchall()
+        return [dict(zip(self.EXIT_FIELDS, row)) for row in rows]
+
+    def exits_between(self, start, end):
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {self.EXIT_COLUMNS} FROM exit_logs WHERE exit_time >= ? AND exit_time < ? "
+                "ORDER BY exit_time, id", (start.strftime("%Y-%m-%d %H:%M:%S"),
+                                           end.strftime("%Y-%m-%d %H:%M:%S"))).fetchall()
+        return [dict(zip(self.EXIT_FIELDS, row)) for row in rows]
+
+    def watch(self, sessions):
+        pass  # Only this terminal writes the local database
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+# In-memory backend for load tests and offline runs; nothing survives the process
+class MemoryStorage:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.parked_vehicles = {}
+        self.available_parking_slots = all_parking_slots()
+        self.entry_logs = {}
+        self.exit_history_partitions = collections.defaultdict(dict)  # partition -> {event id: exit}
+        self.exit_index = collections.defaultdict(dict)  # vehicle number -> {event id: partition}
+
+    def load(self):
+        with self.lock:
+            return ({vehicle_number: dict(entry) for vehicle_number, entry in self.parked_vehicles.items()},
+                    set(self.available_parking_slots))
+
+    def save_state(self, parked_vehicles, available_parking_slots):
+        with self.lock:
+            self.parked_vehicles = {vehicle_number: dict(entry) for vehicle_number, entry in parked_vehicles.items()}
+            self.available_parking_slots = set(available_parking_slots)
+
+    def record_entry(self, vehicle_number, entry_data):
+        with self.lock:
+            self.entry_logs[vehicle_number] = dict(entry_data)
+            self.parked_vehicles[vehicle_number] = dict(entry_data)
+            self.available_parking_slots.discard(entry_data["parking_slot"])
+
+    def record_exit(self, vehicle_number, exit_data):
+        with self.lock:
+            event_id = exit_event_id(exit_data["exit_time"])
+            partition = exit_partition(exit_data["exit_time"])
+            self.exit_history_partitions[partition][event_id] = dict(exit_data, vehicle_number=vehicle_number,
+                                                                     event_id=event_id)
+            self.exit_index[vehicle_number][event_id] = partition
+            self.parked_vehicles.pop(vehicle_number, None)
+            self.available_parking_slots.add(exit_data["parking_slot"])
+
+    def entry_log(self, vehicle_number):
+        with self.lock:
+            entry = self.entry_logs.get(vehicle_number)
+            return dict(entry) if entry else None
+
+    def exit_log(self, vehicle_number):
+        history = self.exit_history(vehicle_number)
+        return history[-1] if history else None
+
+    def exit_history(self, vehicle_number):
+        with self.lock:
+            return [dict(self.exit_history_partitions[partition][event_id])
+                    for event_id, partition in sorted(self.exit_index.get(vehicle_number, {}).items())]
+
+    def exits_between(self, start, end):
+        with self.lock:
+            events = [dict(event) for partition in exit_partitions(start, end)
+                      for event in self.exit_history_partitions.get(partition, {}).values()]
+        return select_exits(events, start, end)
+
+    def watch(self, sessions):
+        pass  # Only this process writes the in-memory store
+
+    def close(self):
+        pass
+
+# Function to open the configured storage backend
+def open_storage(backend=STORAGE_BACKEND):
+    if backend == "firebase":
+        # pyrebase builds each request path on the database object, so the sync thread gets its own
+        return FirebaseStorage(db, WriteAheadLog(firebase.database()).start())
+    if backend == "sqlite":
+        return SQLiteStorage()
+    if backend == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Unknown storage backend {backend!r} (expected firebase, sqlite or memory)")
+
+# Function to turn a pyrebase change-stream message into (path below the streamed node, data) changes
+def stream_changes(message):
+    path = message.get("path", "/").strip("/")
+    if message.get("event") == "put":
+        return [(path, message.get("data"))]
+    if message.get("event") == "patch":
+        return [(f"{path}/{key}" if path else key, value) for key, value in (message.get("data") or {}).items()]
+    return []  # keep-alive and cancel events carry no data
+
+# Authoritative in-memory view of the parked vehicles and free slots. Entries and exits on this terminal
+# are applied directly, changes made elsewhere arrive through the storage backend's change stream, and
+# exits are resolved against it without a database round trip
+class SessionIndex:
+    def __init__(self, parked_vehicles=None, available_parking_slots=()):
+        self.lock = threading.Lock()
+        self.parked_vehicles = dict(parked_vehicles or {})
+        self.available_parking_slots = set(available_parking_slots)
+        self.remote_changes = 0
+
+    def __contains__(self, vehicle_number):
+        with self.lock:
+            return vehicle_number in self.parked_vehicles
+
+    def __len__(self):
+        with self.lock:
+            return len(self.parked_vehicles)
+
+    def lookup(self, vehicle_number):
+        with self.lock:
+            entry = self.parked_vehicles.get(vehicle_number)
+            return dict(entry) if entry else None
+
+    def vehicles(self):
+        with self.lock:
+            return {vehicle_number: dict(entry) for vehicle_number, entry in self.parked_vehicles.items()}
+
+    def free_slots(self):
+        with self.lock:
+            return set(self.available_parking_slots)
+
+    def park(self, vehicle_number, entry_data):
+        with self.lock:
+            self.parked_vehicles[vehicle_number] = dict(entry_data)
+            self.available_parking_slots.discard(entry_data["parking_slot"])
+
+    def leave(self, vehicle_number, parking_slot):
+        with self.lock:
+            self.parked_vehicles.pop(vehicle_number, None)
+            self.available_parking_slots.add(parking_slot)
+
+    def apply_remote(self, node, path, data):
+        # A change-stream event for the parked_vehicles or available_parking_slots node; an empty path
+        # replaces the whole node
+        with self.lock:
+            if node == "parked_vehicles":
+                if path:
+                    apply_changes(self.parked_vehicles, {path: data})
+                else:
+                    self.parked_vehicles = dict(data or {})
+            else:
+                if path:
+                    slots = apply_changes({str(slot): True for slot in self.available_parking_slots}, {path: data})
+                else:
+                    slots = data
+                self.available_parking_slots = parse_slots(slots or {})
+            self.remote_changes += 1
+        metrics.inc("session_stream_events")
+
 class ParkingSystem:
-    def __init__(self, master):
+    def __init__(self, master, storage=None):
         self.master = master
         self.master.title("Parking Billing System")
 
@@ -43,9 +936,23 @@ class ParkingSystem:
         self.entry_button.grid(row=0, column=0, padx=10, pady=10)
         self.exit_button.grid(row=0, column=1, padx=10, pady=10)
 
+        # Open the gate camera once and keep it warm (and idle) for every entry and exit
+        self.cameras = CameraManager()
+        self.cameras.get(CAMERA_SOURCE).pause()
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
+
+        # Storage backend for the parking state and the entry and exit logs
+        self.storage = storage or open_storage()
+
         # Initialize the parking system
         self.load_data()  # Load existing data from the database
 
+    def close(self):
+        # Release the camera and close the storage backend
+        self.cameras.release()
+        self.storage.close()
+        self.master.destroy()
+
     def entry_interface(self):
         EntryInterface(self.master, self, self.update_exit_display)
 
@@ -58,24 +965,18 @@ class ParkingSystem:
             self.exit_interface.update_display()
 
     def load_data(self):
-        try:
-            data = db.child("parking_data").get().val()
-            if data:
-                self.parked_vehicles = data.get('parked_vehicles', {})
-                self.available_parking_slots = set(data.get('available_parking_slots', range(1, 6)))
-            else:
-                # Initialize data if it doesn't exist
-                self.parked_vehicles = {}
-                self.available_parking_slots = set(range(1, 6))
-        except Exception as e:
-            print("Error loading data:", str(e))
+        # Load existing data from the storage backend into the session index and keep following it
+        self.sessions = SessionIndex(*self.storage.load())
+        self.storage.watch(self.sessions)
 
     def save_data(self):
-        data = {'parked_vehicles': self.parked_vehicles, 'available_parking_slots': list(self.available_parking_slots)}
-        try:
-            db.child("parking_data").set(data)
-        except Exception as e:
-            print("Error saving data:", str(e))
+        # Rewrite the parked vehicles and free slots in the storage backend
+        self.storage.save_state(self.sessions.vehicles(), self.sessions.free_slots())
+
+    def record_entry(self, vehicle_number, entry_time, parking_slot):
+        entry_data = {"entry_time": entry_time.strftime("%Y-%m-%d %H:%M:%S"), "parking_slot": parking_slot}
+        self.sessions.park(vehicle_number, entry_data)
+        self.storage.record_entry(vehicle_number, entry_data)
 
     def record_exit(self, vehicle_number, entry_time, exit_time, parking_slot, total_cost):
         exit_data = {
@@ -85,10 +986,23 @@ class ParkingSystem:
             "total_cost": total_cost
         }
 
-        try:
-            db.child("parking_data").child("exit_logs").child(vehicle_number).set(exit_data)
-        except Exception as e:
-            print("Error recording exit data:", str(e))
+        # Release the parking slot only when the vehicle exits
+        self.sessions.leave(vehicle_number, parking_slot)
+        self.storage.record_exit(vehicle_number, exit_data)
+
+# Function to ask the operator to confirm a plate the camera could not read within its budget
+def show_partial_read(window, plate_read, action, command, row=1):
+    if plate_read.text:
+        message = f"Partial read (confidence {plate_read.confidence:.0%}), please check the plate"
+    else:
+        message = "No plate read, please enter the plate"
+    tk.Label(window, text=message).grid(row=row, column=0, padx=10, pady=10, columnspan=2)
+    tk.Button(window, text=action, command=command).grid(row=row + 1, column=0, padx=10, pady=10)
+
+# Function to bring a typed or read vehicle number to the form the parking data is keyed by (no spaces,
+# upper case), so "ka 01 ab 1234" parks and exits as KA01AB1234
+def normalize_plate(text):
+    return re.sub(r'\s', '', text).upper()
 
 class EntryInterface(tk.Toplevel):
     def __init__(self, master, parking_system, exit_callback):
@@ -98,47 +1012,41 @@ class EntryInterface(tk.Toplevel):
         self.exit_callback = exit_callback  # Callback function to update exit model
 
         # Call the license plate recognition code to obtain the result
-        recognized_plate = detect_and_extract_number_plate()
+        plate_read = detect_and_extract_number_plate(cameras=self.parking_system.cameras)
 
         # Set the recognized license plate in the entry box after removing spaces
-        recognized_plate = recognized_plate.replace(" ", "")
+        recognized_plate = plate_read.text.replace(" ", "")
         self.vehicle_number_entry = tk.Entry(self)
         self.vehicle_number_entry.insert(tk.END, recognized_plate)
 
         # Grid layout
         self.vehicle_number_entry.grid(row=0, column=0, padx=10, pady=10)
 
-        # Directly park the vehicle
-        self.park_vehicle()
+        # Directly park the vehicle, or let the operator correct a partial read first
+        if plate_read.complete:
+            self.park_vehicle()
+        else:
+            show_partial_read(self, plate_read, "Park", self.park_vehicle)
 
     def park_vehicle(self):
-        if not self.validate_input():
+        vehicle_number = normalize_plate(self.vehicle_number_entry.get())
+        if not self.validate_input(vehicle_number):
             return
 
-        vehicle_number = self.vehicle_number_entry.get()
-        if vehicle_number in self.parking_system.parked_vehicles:
+        if vehicle_number in self.parking_system.sessions:
             messagebox.showwarning("Warning", f"Vehicle {vehicle_number} is already parked.")
         else:
-            if not self.parking_system.available_parking_slots:
+            available_parking_slots = self.parking_system.sessions.free_slots()
+            if not available_parking_slots:
                 messagebox.showwarning("Warning", "No available parking slots.")
                 return
 
             # Assign a random parking slot
-            parking_slot = random.choice(list(self.parking_system.available_parking_slots))
+            parking_slot = random.choice(list(available_parking_slots))
             entry_time = datetime.now()
 
-            # Convert entry_time to string before storing in Firebase
-            entry_time_str = entry_time.strftime("%Y-%m-%d %H:%M:%S")
-
-            # Update Firebase database with entry information
-            db.child("parking_data").child("entry_logs").child(vehicle_number).set({
-                "entry_time": entry_time_str,
-                "parking_slot": parking_slot
-            })
-
-            self.parking_system.parked_vehicles[vehicle_number] = {"entry_time": entry_time_str,
-                                                                    "parking_slot": parking_slot}
-            self.parking_system.available_parking_slots.remove(parking_slot)
+            # Update Firebase database with entry information, the parked vehicle and the taken slot
+            self.parking_system.record_entry(vehicle_number, entry_time, parking_slot)
 
             messagebox.showinfo("Success", f"Park {vehicle_number} at Slot {parking_slot}")
             self.destroy()  # Close the entry interface after parking
@@ -147,18 +1055,12 @@ class EntryInterface(tk.Toplevel):
             if self.exit_callback:
                 self.exit_callback()
 
-            # Save data to the shared file
-            self.parking_system.save_data()
-
-    def validate_input(self, allow_empty=False):
-        vehicle_number = self.vehicle_number_entry.get().strip().upper()
-
+    def validate_input(self, vehicle_number, allow_empty=False):
         if not allow_empty and not vehicle_number:
             messagebox.showwarning("Warning", "Please enter the vehicle number.")
             return False
 
-        pattern = re.compile(r'^[A-Za-z]{2}\s?\d{2}\s?[A-Za-z]{1,2}\s?\d{4}$')
-        if not pattern.match(vehicle_number):
+        if not PLATE_PATTERN.match(vehicle_number):
             messagebox.showwarning("Warning", "Invalid vehicle number format.")
             return False
 
@@ -177,10 +1079,10 @@ class ExitInterface(tk.Toplevel):
         self.parked_vehicles_text = tk.Text(self, height=10, width=30, state=tk.DISABLED)
 
         # Call the license plate recognition code to obtain the result
-        recognized_plate = detect_and_extract_number_plate()
+        plate_read = detect_and_extract_number_plate(cameras=self.parking_system.cameras)
 
         # Set the recognized license plate in the entry box after removing spaces
-        recognized_plate = recognized_plate.replace(" ", "")
+        recognized_plate = plate_read.text.replace(" ", "")
         self.vehicle_number_entry.insert(tk.END, recognized_plate)
 
         # Grid layout
@@ -189,15 +1091,19 @@ class ExitInterface(tk.Toplevel):
         self.parked_vehicles_label.grid(row=1, column=0, padx=10, pady=10, columnspan=3)
         self.parked_vehicles_text.grid(row=2, column=0, padx=10, pady=10, columnspan=3)
 
-        # Directly print the receipt
-        self.print_receipt()
+        # Directly print the receipt, or let the operator correct a partial read first
+        if plate_read.complete:
+            self.print_receipt()
+        else:
+            show_partial_read(self, plate_read, "Exit", self.print_receipt, row=3)
 
     def print_receipt(self):
-        if not self.validate_input():
+        vehicle_number = normalize_plate(self.vehicle_number_entry.get())
+        if not self.validate_input(vehicle_number):
             return
 
-        vehicle_number = self.vehicle_number_entry.get()
-        entry_info = db.child("parking_data").child("entry_logs").child(vehicle_number).get().val()
+        # The session index follows every terminal's entries, so the exit is resolved locally
+        entry_info = self.parking_system.sessions.lookup(vehicle_number)
 
         if entry_info:
             entry_time = datetime.strptime(entry_info["entry_time"], "%Y-%m-%d %H:%M:%S")
@@ -208,9 +1114,6 @@ class ExitInterface(tk.Toplevel):
             parking_rate = 20  # Cost per hour
             total_cost = total_hours * parking_rate
 
-            # Release the parking slot only when the vehicle exits
-            self.parking_system.available_parking_slots.add(parking_slot)
-
             # Create receipt string
             receipt = f"Receipt for Vehicle {vehicle_number}\n"
             receipt += f"Parked at Slot {parking_slot} since {entry_time}\n"
@@ -221,82 +1124,226 @@ class ExitInterface(tk.Toplevel):
             # Print receipt
             print(receipt)
 
-            # Record exit in Firebase
+            # Record exit in Firebase, releasing the vehicle and its parking slot
             self.parking_system.record_exit(vehicle_number, entry_time, exit_time, parking_slot, total_cost)
 
             # Show messagebox with billing information
             messagebox.showinfo("Billing Information", receipt)
 
-            del self.parking_system.parked_vehicles[vehicle_number]
             self.vehicle_number_entry.delete(0, tk.END)  # Clear the entry field after exit
             self.update_display()
-
-            # Save data to the shared file
-            self.parking_system.save_data()
         else:
             messagebox.showwarning("Warning", f"Vehicle {vehicle_number} is not currently parked.")
 
     def update_display(self):
         self.parked_vehicles_text.config(state=tk.NORMAL)
         self.parked_vehicles_text.delete(1.0, tk.END)
-        if self.parking_system.parked_vehicles:
-            for vehicle, info in self.parking_system.parked_vehicles.items():
+        parked_vehicles = self.parking_system.sessions.vehicles()
+        if parked_vehicles:
+            for vehicle, info in parked_vehicles.items():
                 self.parked_vehicles_text.insert(tk.END,
                                                  f"Vehicle {vehicle} parked at Slot {info['parking_slot']} since {info['entry_time']}\n")
         else:
             self.parked_vehicles_text.insert(tk.END, "No vehicles currently parked.")
         self.parked_vehicles_text.config(state=tk.DISABLED)
 
-    def validate_input(self):
-        vehicle_number = self.vehicle_number_entry.get().strip().upper()
-
+    def validate_input(self, vehicle_number):
         if not vehicle_number:
             messagebox.showwarning("Warning", "Please enter the vehicle number.")
             return False
 
-        pattern = re.compile(r'^[A-Za-z]{2}\s?\d{2}\s?[A-Za-z]{1,2}\s?\d{4}$')
-        if not pattern.match(vehicle_number):
+        if not PLATE_PATTERN.match(vehicle_number):
             messagebox.showwarning("Warning", "Invalid vehicle number format.")
             return False
 
         return True
 
 # Function to preprocess the image
-def preprocess_image(image):
+def preprocess_image(image, filter_diameter=11):
     # Convert the image to grayscale
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
     # Apply bilateral filter to reduce noise while preserving edges
-    blurred = cv2.bilateralFilter(gray, 11, 17, 17)
+    with metrics.timer("bilateral_filter"):
+        blurred = cv2.bilateralFilter(gray, filter_diameter, 17, 17)
 
     # Apply edge detection using the Canny detector
-    edges = cv2.Canny(blurred, 30, 200)
+    with metrics.timer("canny"):
+        edges = cv2.Canny(blurred, 30, 200)
 
     return edges
 
 # Function to find contours in the processed image
-def find_contours(image):
-    # Find contours in the processed image
-    contours, _ = cv2.findContours(image, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+def find_contours(image, min_area=MIN_PLATE_AREA, max_contours=10):
+    # Find contours in the processed image (a flat list, the hierarchy is never used)
+    with metrics.timer("find_contours"):
+        contours, _ = cv2.findContours(image, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return []
 
-    # Filter out contours based on area
-    filtered_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > 1000]
+    # Compute every area once, then filter and sort them in bulk
+    areas = np.fromiter((cv2.contourArea(cnt) for cnt in contours), dtype=np.float64, count=len(contours))
+    keep = np.flatnonzero(areas > min_area)
 
     # Sort contours by area in descending order
-    filtered_contours = sorted(filtered_contours, key=cv2.contourArea, reverse=True)[:10]
-
-    return filtered_contours
+    keep = keep[np.argsort(-areas[keep], kind="stable")][:max_contours]
+
+    return [contours[index] for index in keep]
+
+# Function to turn contours into a compact (N, 4) array of plate-shaped x, y, w, h boxes,
+# together with the (N, 4, 2) corner points of each plate quadrilateral
+def extract_plate_candidates(contours):
+    if not contours:
+        return np.empty((0, 4), dtype=np.int32), np.empty((0, 4, 2), dtype=np.float32)
+
+    # Bounding boxes and aspect ratios for all contours at once
+    boxes = np.array([cv2.boundingRect(cnt) for cnt in contours], dtype=np.int32)
+    aspect_ratios = boxes[:, 2] / np.maximum(boxes[:, 3], 1)
+    plate_shaped = np.flatnonzero((aspect_ratios > 2.0) & (aspect_ratios < 6.0))
+
+    # Only the plate-shaped survivors pay for the polygon approximation; keep the 4-cornered ones
+    rectangles = []
+    quads = []
+    for index in plate_shaped:
+        contour = contours[index]
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            rectangles.append(index)
+            quads.append(approx.reshape(4, 2))
+
+    return boxes[rectangles], np.array(quads, dtype=np.float32).reshape(-1, 4, 2)
+
+# Function to order the corners of a quadrilateral as top-left, top-right, bottom-right, bottom-left
+def order_corners(quad):
+    sums = quad.sum(axis=1)
+    differences = quad[:, 1] - quad[:, 0]
+    return np.array([quad[np.argmin(sums)], quad[np.argmin(differences)],
+                     quad[np.argmax(sums)], quad[np.argmax(differences)]], dtype=np.float32)
+
+# Function to warp a plate quadrilateral to a flat plate of canonical size and binarize it
+def rectify_plate(frame, quad, size=(PLATE_WIDTH, PLATE_HEIGHT)):
+    width, height = size
+    corners = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(order_corners(quad), corners)
+    plate = cv2.warpPerspective(frame, matrix, size, flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+    # Threshold against the local neighbourhood so shadows and glare across the plate do not swallow characters
+    gray = cv2.cvtColor(plate, cv2.COLOR_BGR2GRAY)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 25, 10)
+
+# Function to cut a plate candidate out of the frame for OCR
+def crop_plate(frame, candidate, copy=False):
+    x, y, w, h, quad = candidate
+    if RECTIFY_PLATES:
+        return rectify_plate(frame, quad)
+
+    roi = frame[y:y + h, x:x + w]
+    return roi.copy() if copy else roi
+
+# Long-lived OCR engine that loads the tesseract language model once and reuses it for every call
+class OCREngine:
+    def __init__(self, lang=OCR_LANG, psm=7, oem=3, whitelist=PLATE_ALPHABET):
+        self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.whitelist = whitelist
+        self.lock = threading.Lock()  # A tesseract API handle must not be used by two threads at once
+        self.api = None
+
+        if tesserocr is not None:
+            options = {"lang": lang, "psm": psm, "oem": oem}
+            if TESSDATA_PATH:
+                options["path"] = TESSDATA_PATH
+            self.api = tesserocr.PyTessBaseAPI(**options)
+
+            # Only let tesseract choose from the characters that can appear on a plate
+            if whitelist:
+                self.api.SetVariable("tessedit_char_whitelist", whitelist)
+
+    def image_to_string(self, image):
+        # Without tesserocr keep the old subprocess behaviour
+        if self.api is None:
+            config = f'--oem {self.oem} --psm {self.psm}'
+            if TESSDATA_PATH:
+                config += f' --tessdata-dir "{TESSDATA_PATH}"'
+            if self.whitelist:
+                config += f' -c tessedit_char_whitelist={self.whitelist}'
+            return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+        # Hand the raw pixel buffer to the resident engine (ROI views are made contiguous first)
+        image = np.ascontiguousarray(image)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        with self.lock:
+            self.api.SetImageBytes(image.tobytes(), width, height, channels, image.strides[0])
+            return self.api.GetUTF8Text()
+
+    def close(self):
+        if self.api is not None:
+            self.api.End()
+            self.api = None
+
+# Each thread gets its own engine, since one tesseract handle can only recognise one image at a time
+ocr_local = threading.local()
+
+def get_ocr_engine():
+    engine = getattr(ocr_local, "engine", None)
+    if engine is None:
+        engine = ocr_local.engine = OCREngine()
+    return engine
+
+if tesserocr is None:
+    print("tesserocr is not installed, falling back to a tesseract process per OCR call", file=sys.stderr)
+
+# Start the OCR engine once so the language model is loaded before the first vehicle arrives
+ocr_engine = get_ocr_engine()
+
+# Worker pool for reading several plate candidates of one frame at the same time
+ocr_pool = concurrent.futures.ThreadPoolExecutor(max_workers=OCR_WORKERS, initializer=get_ocr_engine)
+
+# Characters OCR confuses between letters and digits, mapped to what the plate grammar expects instead
+TO_LETTER = str.maketrans("0125684", "OIZSGBA")
+TO_DIGIT = str.maketrans("ODQIJLZSBGAT", "000111258647")
+
+# Function to fix letter/digit mix-ups using the Indian plate grammar: 2 letters (state), 2 digits
+# (district), 1-2 letters (series), 4 digits (number)
+def correct_plate_text(text):
+    # Keep only plate characters
+    characters = re.sub(r'[^A-Z0-9]', '', text.upper())
+
+    # Stray characters from the plate border or an "IND" mark can surround the plate, so try every
+    # plate-length window and keep the valid one that needed the fewest substitutions and dropped characters;
+    # on a tie the window that reads as it is wins, since a substitution that happens to fit the grammar
+    # would otherwise turn a stray edge character into a wrong but valid plate
+    best = None
+    for length in (10, 9):
+        layout = "LLDDLLDDDD" if length == 10 else "LLDDLDDDD"
+        for start in range(len(characters) - length + 1):
+            window = characters[start:start + length]
+            corrected = ''.join(character.translate(TO_LETTER if kind == "L" else TO_DIGIT)
+                                for character, kind in zip(window, layout))
+            if PLATE_PATTERN.match(corrected):
+                substitutions = sum(a != b for a, b in zip(window, corrected))
+                rank = (substitutions + len(characters) - length, substitutions)
+                if best is None or rank < best[0]:
+                    best = (rank, corrected)
+
+    return best[1] if best else characters
+
+# Function to OCR a plate and repair ambiguous characters, without validating the result
+def read_plate_text(image, engine=None):
+    with metrics.timer("ocr"):
+        text = (engine or get_ocr_engine()).image_to_string(image)
+    metrics.inc("ocr_calls")
+    return correct_plate_text(text)
 
 # Function to extract text from the image using Tesseract OCR
-def extract_text_from_image(image):
-    # Use Tesseract OCR to extract text from the image
-    text = pytesseract.image_to_string(image, config='--oem 3 --psm 7')
-
-    # Define a regex pattern for filtering
-    pattern = re.compile(r'^[A-Za-z]{2}\s?\d{2}\s?[A-Za-z]{1,2}\s?\d{4}$')
+def extract_text_from_image(image, engine=None):
+    # Use the persistent Tesseract engine to extract the grammar-corrected text from the image
+    text = read_plate_text(image, engine)
 
     # Find the first match in the text
-    match = pattern.search(text)
+    match = PLATE_PATTERN.search(text)
 
     # Extract the matched text or return an empty string if no match is found
     filtered_text = match.group() if match else ''
@@ -306,81 +1353,1077 @@ def extract_text_from_image(image):
 
     return filtered_text.strip()
 
-# Function to save the image and extract filtered text
-def save_and_extract_text(image):
-    # Save the image
-    cv2.imwrite('number_plate_image.jpg', image)
-
-    # Read the saved image
-    saved_image = cv2.imread('number_plate_image.jpg')
+# Writes plate snapshots on a single background thread through a bounded queue; when the disk falls
+# behind, new snapshots are dropped instead of piling up threads and crop copies
+class SnapshotWriter:
+    def __init__(self, max_pending=SNAPSHOT_QUEUE_SIZE):
+        self.queue = queue.Queue(max_pending)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def submit(self, path, image):
+        with self.lock:
+            # Start the writer on first use, also in a forked batch worker, which inherits no threads
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._write_loop, daemon=True)
+                self.thread.start()
+        try:
+            self.queue.put_nowait((path, image))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc("snapshots_dropped")
+            return False
+        return True
 
-    # Extract filtered text from the saved image
-    saved_image_text = extract_text_from_image(saved_image)
-    print("Filtered Text from saved image:", saved_image_text)
+    def _write_loop(self):
+        while True:
+            path, image = self.queue.get()
+
+            # Create the snapshot directory on demand; cv2.imwrite only reports a failed write by returning False
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                written = cv2.imwrite(path, image)
+            except (OSError, cv2.error) as e:
+                print("Error writing snapshot:", str(e), file=sys.stderr)
+                written = False
+            if written:
+                self.written += 1
+            else:
+                self.failed += 1
+                metrics.inc("snapshots_failed")
+
+    def stats(self):
+        return {"written": self.written, "pending": self.queue.qsize(), "dropped": self.dropped,
+                "failed": self.failed}
+
+snapshot_writer = SnapshotWriter()
+
+# Function to queue a plate snapshot for the background writer (opt-in debugging side channel); returns
+# the file name, or None when snapshots are off or the queue is full
+def save_snapshot(image, snapshot_dir=SNAPSHOT_DIR):
+    if not snapshot_dir:
+        return None
+
+    # Use a unique file name per process and capture so gates sharing a directory never race
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    path = os.path.join(snapshot_dir, f"plate_{os.getpid()}_{timestamp}.jpg")
+
+    # Copy the ROI so the caller can keep reusing the frame buffer while the write is pending
+    return path if snapshot_writer.submit(path, image.copy()) else None
+
+# Function to compute a difference hash of an image: one bit per horizontal brightness step in a small
+# grayscale thumbnail, so near-identical crops get hashes that differ in only a few bits
+def dhash(image, hash_size=16, margin=4):
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    thumbnail = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    # Steps smaller than the margin count as flat, otherwise sensor noise on the plain plate background
+    # flips bits from frame to frame
+    bits = thumbnail[:, 1:] - thumbnail[:, :-1] > margin
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+# Bounded LRU cache of OCR results keyed by the perceptual hash of the plate crop, so the frames of a car
+# waiting at the barrier reuse the first read instead of running OCR again; plates one character apart
+# hash only a few bits apart, so a cache must never outlive the car it was filled for
+class OCRCache:
+    def __init__(self, max_size=OCR_CACHE_SIZE, max_distance=OCR_CACHE_DISTANCE, ttl=OCR_CACHE_TTL):
+        self.max_size = max_size
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.ocr_time = 0.0
+        self.time_saved = 0.0
+
+    def lookup(self, key):
+        now = time.monotonic()
+        with self.lock:
+            # Forget reads older than the TTL
+            for stale in [entry for entry, (_, stored_at) in self.entries.items() if now - stored_at > self.ttl]:
+                del self.entries[stale]
+
+            # Find the closest cached crop within the Hamming distance tolerance
+            best, best_distance = None, self.max_distance + 1
+            for entry in self.entries:
+                distance = bin(entry ^ key).count("1")
+                if distance < best_distance:
+                    best, best_distance = entry, distance
+
+            if best is None:
+                metrics.inc("ocr_cache_misses")
+                self.misses += 1
+                return None
+
+            # Every hit saves about one average OCR call
+            metrics.inc("ocr_cache_hits")
+            self.hits += 1
+            self.time_saved += self.ocr_time / max(1, self.misses)
+            self.entries.move_to_end(best)
+            return self.entries[best][0]
+
+    # Called after every miss with the time its OCR took; only valid plates are remembered, so an empty or
+    # garbled read is retried on the next frame
+    def store(self, key, text, ocr_seconds):
+        with self.lock:
+            self.ocr_time += ocr_seconds
+            if not PLATE_PATTERN.match(text):
+                return
+            self.entries[key] = (text, time.monotonic())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                    "ocr_time_saved_s": round(self.time_saved, 3), "entries": len(self.entries)}
+
+# Function to create the OCR cache of one capture or lane (None when caching is off, or when consensus
+# voting needs every frame read afresh so that one read does not vote again for every similar frame)
+def make_ocr_cache(consensus_frames=CONSENSUS_FRAMES):
+    return OCRCache() if OCR_CACHE_SIZE > 0 and consensus_frames <= 1 else None
+
+# Function to bring a plate crop to the canonical size as a binary image with white characters on black
+def binarize_plate(image):
+    if image.ndim == 3:
+        gray = cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), (PLATE_WIDTH, PLATE_HEIGHT))
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 25, 10)
+    else:
+        # Rectified plates are already binarized
+        binary = cv2.resize(image, (PLATE_WIDTH, PLATE_HEIGHT), interpolation=cv2.INTER_NEAREST)
+    return cv2.bitwise_not(binary)
+
+# Function to cut a plate into character images (left to right) using connected components
+def segment_characters(image):
+    binary = binarize_plate(image)
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+
+    # Characters are between 40% and 95% of the plate height, narrower than a quarter of the plate and
+    # clear of its edges, which drops specks, bolts and what is left of the plate border
+    x, y, w, h = (stats[1:, index] for index in (cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP,
+                                                 cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT))
+    keep = np.flatnonzero((h > 0.4 * PLATE_HEIGHT) & (h < 0.95 * PLATE_HEIGHT) & (w < PLATE_WIDTH // 4)
+                          & (x > 0) & (y > 0) & (x + w < PLATE_WIDTH) & (y + h < PLATE_HEIGHT))
+    keep = keep[np.argsort(x[keep])]
+
+    return [cv2.resize(binary[y[i]:y[i] + h[i], x[i]:x[i] + w[i]], CHAR_SIZE, interpolation=cv2.INTER_AREA)
+            for i in keep]
+
+# Nearest-neighbour character matcher on normalized character images, used as a fast path before tesseract
+class CharClassifier:
+    def __init__(self, templates, labels):
+        self.templates = self.features(templates)
+        self.labels = np.asarray(labels)
+        self.is_digit = np.char.isdigit(self.labels)
+        self.fast_reads = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["templates"], data["labels"])
+
+    @staticmethod
+    def features(characters):
+        # Zero-mean, unit-length vectors, so a dot product is the correlation between two characters
+        vectors = np.asarray(characters, dtype=np.float32).reshape(len(characters), -1)
+        vectors -= vectors.mean(axis=1, keepdims=True)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-6)
+        return vectors
+
+    def read_plate(self, image):
+        # Returns the plate text and the worst per-character correlation ('' and 0.0 when it cannot tell)
+        characters = segment_characters(image)
+        if len(characters) not in (9, 10):
+            return '', 0.0
+
+        # Score every character against every template at once, then only let each position pick
+        # letters or digits as the plate grammar dictates
+        scores = self.features(characters) @ self.templates.T
+        layout = np.array([kind == "D" for kind in ("LLDDLLDDDD" if len(characters) == 10 else "LLDDLDDDD")])
+        scores[layout[:, None] != self.is_digit[None, :]] = -1.0
+
+        best = scores.argmax(axis=1)
+        text = ''.join(self.labels[best])
+        confidence = float(scores[np.arange(len(best)), best].min())
+        return (text, confidence) if PLATE_PATTERN.match(text) else ('', 0.0)
+
+char_classifier = CharClassifier.load(CHAR_TEMPLATES) if CHAR_TEMPLATES else None
+
+# Function to read a plate crop, trying the fast character matcher first and tesseract when it is unsure
+# (the result is not validated, so partial reads survive for the operator)
+def recognize_plate(image):
+    if char_classifier:
+        text, confidence = char_classifier.read_plate(image)
+        if confidence >= FAST_OCR_CONFIDENCE:
+            char_classifier.fast_reads += 1
+            return text
+        char_classifier.fallbacks += 1
+
+    return read_plate_text(image)
+
+# Function to extract filtered text straight from the in-memory ROI (reads that do not validate as a plate
+# are appended to partials when a list is given, and the read of a near-identical crop is reused when a
+# cache is given)
+def save_and_extract_text(image, snapshot_dir=SNAPSHOT_DIR, partials=None, cache=None):
+    key = dhash(image) if cache else None
+    image_text = cache.lookup(key) if cache else None
+
+    if image_text is None:
+        # Pass the ROI view directly to OCR instead of a JPEG round-trip through the disk
+        started = time.perf_counter()
+        image_text = recognize_plate(image)
+        if cache:
+            cache.store(key, image_text, time.perf_counter() - started)
+
+    # Only a text matching the plate format counts as a read
+    if not PLATE_PATTERN.match(image_text):
+        if partials is not None and image_text:
+            partials.append(image_text)
+        image_text = ''
+    print("Filtered Text from number plate:", image_text, file=sys.stderr)
+
+    # Optionally keep a copy of the crop on disk
+    save_snapshot(image, snapshot_dir)
 
     # Return the filtered text
-    return saved_image_text
-
-# Function to detect and extract the number plate
-def detect_and_extract_number_plate():
-    # Open the webcam
-    cap = cv2.VideoCapture(0)
-
-    # Flag to track whether a valid result has been found
-    result_found = False
-
-    while not result_found:
-        # Capture a frame from the webcam
-        ret, frame = cap.read()
-
-        # Preprocess the frame
-        processed_frame = preprocess_image(frame)
-
-        # Find contours in the processed frame
-        contours = find_contours(processed_frame)
+    return image_text
+
+# Background frame reader that keeps only the newest frames so OCR never works on a stale image
+class FrameGrabber:
+    def __init__(self, source=0, buffer_size=2, realtime=None, warmup_frames=0, reconnect=None,
+                 idle_interval=CAMERA_IDLE_INTERVAL, stale_frames=2):
+        self.source = source
+        self.capture = cv2.VideoCapture(source)
+        self.frames = collections.deque(maxlen=buffer_size)
+        self.condition = threading.Condition()
+        self.running = False
+        self.warmup_frames = warmup_frames
+        self.reconnects = 0
+
+        # While paused nobody is waiting for frames: the device is only kept streaming, and the frames the
+        # driver queued meanwhile are skipped when a capture resumes
+        self.idle = False
+        self.idle_interval = idle_interval
+        self.stale_frames = stale_frames
+        self.thread = threading.Thread(target=self._capture_loop, daemon=True)
+
+        # Counters for the capture stage
+        self.frames_captured = 0
+        self.frames_consumed = 0
+        self.frames_dropped = 0
+        self.total_latency = 0.0
+        self.last_latency = 0.0
+
+        # Recorded video is paced at its own frame rate so it behaves like a live camera
+        if realtime is None:
+            realtime = isinstance(source, str)
+        fps = self.capture.get(cv2.CAP_PROP_FPS) if realtime else 0
+        self.frame_interval = 1.0 / fps if fps and fps > 0 else 0
+
+        # A camera that fails is reopened, while the end of a recording ends the capture
+        if reconnect is None:
+            reconnect = not (isinstance(source, str) and os.path.isfile(source))
+        self.reconnect = reconnect
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+        return self
+
+    def _capture_loop(self):
+        next_frame_time = time.perf_counter()
+        warmup = self.warmup_frames
+        failures = 0
+        while self.running:
+            idle = self.idle
+            if idle:
+                ret, frame = self.capture.grab(), None  # No decoding while idle
+            else:
+                with metrics.timer("capture"):
+                    ret, frame = self.capture.read()
+            if not ret:
+                if not self.reconnect:
+                    break  # End of the recording
+
+                # The camera went away: wait with a growing back-off, reopen it and let it warm up again
+                delay = min(CAMERA_RECONNECT_DELAY * 2 ** failures, 10)
+                failures += 1
+                with self.condition:
+                    if self.condition.wait_for(lambda: not self.running, delay):
+                        break
+                self.capture.release()
+                self.capture = cv2.VideoCapture(self.source)
+                self.reconnects += 1
+                metrics.inc("camera_reconnects")
+                warmup = self.warmup_frames
+                continue
+            failures = 0
+
+            # Grab a few frames a second until a capture resumes, and buffer (and drop) nothing meanwhile
+            if idle:
+                warmup = max(warmup - 1, self.stale_frames)
+                with self.condition:
+                    self.condition.wait_for(lambda: not self.running or not self.idle, self.idle_interval)
+                next_frame_time = time.perf_counter()
+                continue
+
+            # Skip the first frames after opening while exposure and white balance settle
+            if warmup:
+                warmup -= 1
+                continue
+
+            with self.condition:
+                # A full buffer evicts its oldest frame, which is then never processed
+                if len(self.frames) == self.frames.maxlen:
+                    self.frames_dropped += 1
+                    metrics.inc("frames_dropped")
+                self.frames.append((time.perf_counter(), frame))
+                self.frames_captured += 1
+                self.condition.notify_all()
+
+            if self.frame_interval:
+                next_frame_time += self.frame_interval
+                delay = next_frame_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+    def read(self, timeout=None):
+        # Wait for a frame, take the newest one and drop everything older
+        with self.condition:
+            self.condition.wait_for(lambda: self.frames or not self.running, timeout)
+            if not self.frames:
+                return None
+            captured_at, frame = self.frames.pop()
+            self.frames_dropped += len(self.frames)
+            metrics.inc("frames_dropped", len(self.frames))
+            self.frames.clear()
+
+        self.frames_consumed += 1
+        return captured_at, frame
+
+    def pause(self):
+        # Frames buffered for the capture that just ended would be stale for the next one
+        with self.condition:
+            self.idle = True
+            self.frames.clear()
+
+    def resume(self):
+        with self.condition:
+            self.idle = False
+            self.condition.notify_all()
+
+    def record_latency(self, captured_at):
+        # End-to-end latency from the moment the frame was captured until it has been fully processed
+        self.last_latency = time.perf_counter() - captured_at
+        self.total_latency += self.last_latency
+        metrics.observe("frame_latency", self.last_latency)
+
+    def stats(self):
+        return {
+            "frames_captured": self.frames_captured,
+            "frames_processed": self.frames_consumed,
+            "frames_dropped": self.frames_dropped,
+            "reconnects": self.reconnects,
+            "last_latency_ms": round(1000 * self.last_latency, 2),
+            "mean_latency_ms": round(1000 * self.total_latency / max(1, self.frames_consumed), 2),
+        }
 
-        # Iterate through the contours and find the rectangle with the highest aspect ratio
-        for contour in contours:
-            epsilon = 0.02 * cv2.arcLength(contour, True)
-            approx = cv2.approxPolyDP(contour, epsilon, True)
+    def release(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.capture.release()
+
+# Keeps camera devices open and warm between plate captures, so a vehicle does not wait for the device to
+# open and settle; a device whose capture thread has ended is opened again on the next request, and a
+# grabber returned by get() captures at full rate until it is paused again
+class CameraManager:
+    def __init__(self, warmup_frames=CAMERA_WARMUP_FRAMES):
+        self.warmup_frames = warmup_frames
+        self.grabbers = {}
+        self.lock = threading.Lock()
+
+    def get(self, source=CAMERA_SOURCE):
+        source = parse_source(source)
+        with self.lock:
+            grabber = self.grabbers.get(source)
+            if grabber is None or not grabber.running:
+                if grabber:
+                    grabber.release()
+                grabber = FrameGrabber(source, warmup_frames=self.warmup_frames).start()
+                self.grabbers[source] = grabber
+                metrics.inc("camera_opens")
+            grabber.resume()
+            return grabber
+
+    def stats(self):
+        with self.lock:
+            return {str(source): grabber.stats() for source, grabber in self.grabbers.items()}
+
+    def release(self):
+        with self.lock:
+            for grabber in self.grabbers.values():
+                grabber.release()
+            self.grabbers.clear()
+
+# Outcome of a plate capture: the text, how much the frames agreed on it, and whether it is a confirmed
+# plate (False when the budget ran out and the text is only the best partial read)
+PlateRead = collections.namedtuple("PlateRead", ["text", "confidence", "complete"])
+
+# Combines plate reads from several frames by voting on every character position
+class PlateVoter:
+    def __init__(self, max_reads=CONSENSUS_FRAMES, threshold=CONSENSUS_THRESHOLD):
+        self.max_reads = max(1, max_reads)
+        self.threshold = threshold
+        self.reads = []
+        self.partials = []
+        self.frames = 0
+
+    def add(self, read, partials=()):
+        # Every frame counts towards the frames needed, but only valid reads get a vote
+        self.frames += 1
+        if read:
+            self.reads.append(read.replace(" ", "").upper())
+        self.partials.extend(partials)
+
+    def result(self):
+        if not self.reads:
+            return '', 0.0
+
+        # Align the reads of the most common length by character position and take the majority per position
+        length = collections.Counter(len(read) for read in self.reads).most_common(1)[0][0]
+        aligned = [read for read in self.reads if len(read) == length]
+
+        text = ''
+        agreement = 1.0
+        for characters in zip(*aligned):
+            character, votes = collections.Counter(characters).most_common(1)[0]
+            text += character
+            # Reads of another length count as disagreeing with every position
+            agreement = min(agreement, votes / len(self.reads))
+
+        return text, agreement
+
+    def best_partial(self):
+        # The most frequent read that did not validate, with the share of partial reads agreeing on it
+        if not self.partials:
+            return '', 0.0
+        text, votes = collections.Counter(self.partials).most_common(1)[0]
+        return text, votes / len(self.partials)
+
+    def done(self):
+        if len(self.reads) >= self.max_reads:
+            return True
+
+        # Stop early once at least two reads agree well enough
+        return len(self.reads) >= 2 and self.result()[1] >= self.threshold
+
+# Cheap frame differencing on a small grayscale copy so idle gate frames skip the full pipeline
+class MotionGate:
+    def __init__(self, threshold=MOTION_THRESHOLD, hold_frames=MOTION_HOLD_FRAMES, region=None, width=160,
+                 learning_rate=0.05):
+        self.threshold = threshold
+        self.hold_frames = hold_frames
+        self.region = region
+        self.width = width
+        self.learning_rate = learning_rate
+        self.background = None
+        self.hold = 0
+        self.frames_processed = 0
+        self.frames_skipped = 0
+
+    def is_active(self, frame):
+        # Only look at the gate region when one is configured
+        if self.region:
+            x, y, w, h = self.region
+            frame = frame[y:y + h, x:x + w]
+
+        # Downscale and blur so sensor noise does not count as motion
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (self.width, max(1, height * self.width // width)), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+
+        if self.background is None:
+            # Nothing to compare against yet, so examine the first frame
+            self.background = gray.astype(np.float32)
+            changed = 1.0
+        else:
+            difference = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+            changed = np.count_nonzero(difference > 25) / difference.size
+
+        # Compare against a learned background (not just the previous frame), and only learn while the gate
+        # is empty: a car standing still at the barrier would otherwise fade into the background and be
+        # gated out, also on the operator's next capture of the same car
+        active = changed >= self.threshold
+        if not active and self.hold == 0:
+            cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+
+        if active:
+            self.hold = self.hold_frames
+        elif self.hold > 0:
+            self.hold -= 1
+            active = True
+
+        if active:
+            self.frames_processed += 1
+        else:
+            self.frames_skipped += 1
+            metrics.inc("frames_skipped_idle")
+        return active
+
+    def stats(self):
+        return {"frames_processed": self.frames_processed, "frames_skipped": self.frames_skipped}
+
+# Gate region "x,y,w,h" the motion gates watch (None watches the whole frame)
+gate_region = tuple(int(value) for value in GATE_REGION.split(",")) if GATE_REGION else None
+
+# Motion gates per camera source, kept between captures so the learned background survives
+motion_gates = {}
+
+def get_motion_gate(source):
+    if source not in motion_gates:
+        motion_gates[source] = MotionGate(region=gate_region)
+    return motion_gates[source]
+
+# Optional camera preview, redrawn at a capped rate so the recognition loop spends little time on the GUI;
+# OpenCV windows must be drawn from the thread that runs the capture loop (the Tk main thread), so frames
+# that arrive between two redraws are simply skipped; the plate boxes are only drawn here
+class PreviewWindow:
+    def __init__(self, title="Webcam", fps=PREVIEW_FPS):
+        self.title = title
+        self.interval = 1 / fps
+        self.next_draw = 0.0
+        self.quit_requested = False
+        self.opened = False
+
+    def show(self, frame, boxes):
+        now = time.monotonic()
+        if now < self.next_draw:
+            return
+        self.next_draw = now + self.interval
 
-            # Check if the contour is a rectangle
-            if len(approx) == 4:
-                x, y, w, h = cv2.boundingRect(contour)
+        # Draw a rectangle around every number plate candidate
+        frame = frame.copy()
+        for x, y, w, h in boxes or ():
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.imshow(self.title, frame)
+        self.opened = True
 
-                # Check if the aspect ratio is within a certain range (adjust as needed)
-                aspect_ratio = float(w) / h
-                if 2.0 < aspect_ratio < 6.0:
-                    # Draw a rectangle around the number plate
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        # A 1 ms waitKey lets the window repaint and picks up the 'q' key without pacing the capture loop
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.quit_requested = True
+
+    def close(self):
+        if self.opened:
+            cv2.destroyWindow(self.title)
+            cv2.waitKey(1)
+
+# Function to turn a camera index or video file path into a cv2.VideoCapture source
+def parse_source(source):
+    return int(source) if str(source).isdigit() else source
+
+# Function to look for a number plate in a single frame ('' when nothing readable is found)
+def read_number_plate(frame, tracker=None, submit=None, boxes=None, partials=None, cache=None):
+    # Search the whole frame, or only around the plate that is being tracked
+    with metrics.timer("detection"):
+        candidates = tracker.find_candidates(frame) if tracker else find_plate_candidates(frame)
+    metrics.inc("frames_processed")
+    metrics.inc("candidates", len(candidates))
+    metrics.set_gauge("candidates_last_frame", len(candidates))
+
+    # A single candidate is cheaper to read on this thread than through the pool (unless a shared
+    # scheduler was given, which has to see every OCR call to stay fair)
+    if len(candidates) == 1 and submit is None:
+        result = save_and_extract_text(crop_plate(frame, candidates[0]), SNAPSHOT_DIR, partials, cache)
+        if boxes is not None:
+            boxes.append(candidates[0][:4])
+        if result and tracker:
+            tracker.update(candidates[0])
+        elif tracker:
+            tracker.miss()
+        return result
+
+    # OCR the regions of interest in parallel (copies, so the frame can be handed to the preview meanwhile)
+    submit = submit or ocr_pool.submit
+    futures = [submit(save_and_extract_text, crop_plate(frame, candidate, copy=True), SNAPSHOT_DIR, partials,
+                      cache) for candidate in candidates]
+
+    # Accept results in contour order so the answer matches the serial loop, and cancel the rest once one reads
+    result = ''
+    for candidate, future in zip(candidates, futures):
+        if result:
+            future.cancel()
+            continue
+
+        # Remember the box for the preview (nothing is collected or drawn when no one is watching)
+        if boxes is not None:
+            boxes.append(candidate[:4])
+        result = future.result()
+
+        # Keep following the rectangle that actually read as a plate
+        if result and tracker:
+            tracker.update(candidate)
+
+    if tracker and not result:
+        tracker.miss()
+    return result
 
-                    # Extract the region of interest (ROI) containing the number plate
-                    roi = frame[y:y + h, x:x + w]
+# Function to find plate-shaped rectangles in a frame as (x, y, w, h, corners) candidates (offset maps
+# window coordinates back to the full frame)
+def find_plate_candidates(frame, offset=(0, 0), scale=DETECTION_SCALE):
+    # Detect on a downscaled copy when a detection scale is set; OCR still crops the full-resolution frame
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # Preprocess the frame (the filter neighbourhood shrinks with the image, and must stay odd)
+    processed_frame = preprocess_image(frame, max(3, int(11 * scale)) | 1)
+
+    # Find contours in the processed frame (areas shrink with the square of the scale, aspect ratios do not change)
+    contours = find_contours(processed_frame, MIN_PLATE_AREA * scale * scale)
+
+    # Keep the 4-cornered contours with a plate-like aspect ratio
+    boxes, quads = extract_plate_candidates(contours)
+
+    # Map the boxes and corners back to full-resolution frame coordinates
+    boxes = np.rint(boxes / scale).astype(np.int32) + np.array([offset[0], offset[1], 0, 0], dtype=np.int32)
+    quads = quads / scale + np.array(offset, dtype=np.float32)
+
+    return [tuple(box) + (quad,) for box, quad in zip(boxes.tolist(), quads)]
+
+# Follows a plate rectangle between frames by searching a small window around its last position, so the
+# full-frame contour search only runs to acquire a plate or after the track is lost; the track is only
+# started or moved by a read that validated as a plate, never by an unconfirmed plate-shaped box
+class PlateTracker:
+    def __init__(self, max_misses=TRACK_MAX_MISSES, refresh_frames=TRACK_REFRESH_FRAMES):
+        self.max_misses = max_misses
+        self.refresh_frames = refresh_frames
+        self.box = None
+        self.misses = 0
+        self.age = 0
+        self.full_searches = 0
+        self.local_searches = 0
+
+    # Called with the candidate box that read as a plate
+    def update(self, box):
+        if self.box is None:
+            self.age = 0
+        self.box = box
+        self.misses = 0
+
+    # Called when a frame gave no valid read
+    def miss(self):
+        self.misses += 1
+
+    def find_candidates(self, frame):
+        # Re-acquire with a full search every so often, and give the track a few frames without a valid read
+        # (motion blur, occlusion) before it counts as lost
+        self.age += 1
+        if self.box is not None and self.age <= self.refresh_frames and self.misses <= self.max_misses:
+            x, y, w, h = self.box[:4]
+
+            # Allow the plate to move by half its width and a full height between frames
+            frame_height, frame_width = frame.shape[:2]
+            left, top = max(0, x - w // 2), max(0, y - h)
+            right, bottom = min(frame_width, x + w + w // 2), min(frame_height, y + 2 * h)
+
+            self.local_searches += 1
+            return find_plate_candidates(frame[top:bottom, left:right], (left, top))
+
+        # No confirmed plate yet or the track was lost: search the whole frame
+        self.box = None
+        self.full_searches += 1
+        return find_plate_candidates(frame)
+
+    def stats(self):
+        return {"full_searches": self.full_searches, "local_searches": self.local_searches}
 
-                    # Save the image and extract filtered text from the saved image
-                    result = save_and_extract_text(roi)
+# Function to detect and extract the number plate
+def detect_and_extract_number_plate(source=CAMERA_SOURCE, consensus_frames=CONSENSUS_FRAMES,
+                                    budget=CAPTURE_BUDGET_SECONDS, max_frames=CAPTURE_MAX_FRAMES, cameras=None):
+    # Give up after the latency budget or the frame limit so a dirty plate cannot block the gate
+    deadline = time.monotonic() + budget
+
+    # Use the warm camera from the camera manager, or start reading the webcam (or recorded video) on its own thread
+    source = parse_source(source)
+    grabber = cameras.get(source) if cameras else FrameGrabber(source).start()
+    motion_gate = get_motion_gate(source) if MOTION_GATE else None
+    tracker = PlateTracker() if TRACKING else None
+    preview = None if HEADLESS else PreviewWindow()
+
+    # Collect reads until enough frames agree on the plate (every vote needs its own OCR read)
+    voter = PlateVoter(consensus_frames)
+    cache = make_ocr_cache(consensus_frames)  # A new cache per capture, so no read carries over to the next car
+    frames = 0
+    while not voter.done():
+        if frames >= max_frames:
+            metrics.inc("capture_frame_limit_reached")
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            metrics.inc("capture_budget_overruns")
+            break
 
-                    # Check if a valid result is obtained
-                    if result:
-                        result_found = True
-                        break
+        # Always work on the newest captured frame
+        item = grabber.read(timeout=remaining)
+        if item is None:
+            if grabber.running:
+                continue  # No frame before the deadline; the check above ends the capture
+            break
+        captured_at, frame = item
+        frames += 1
+
+        # Run the full pipeline only when something is moving or standing in the gate region
+        boxes = [] if preview else None
+        if motion_gate is None or motion_gate.is_active(frame):
+            partials = []
+            voter.add(read_number_plate(frame, tracker, boxes=boxes, partials=partials, cache=cache),
+                      partials)
+        grabber.record_latency(captured_at)
+
+        # Redraw the preview (at most PREVIEW_FPS times a second), and stop when 'q' was pressed there
+        if preview:
+            preview.show(frame, boxes)
+            if preview.quit_requested:
+                break
+
+    # Release the webcam (or let it idle when the camera manager keeps it warm) and close the preview window
+    if cameras:
+        grabber.pause()
+    else:
+        grabber.release()
+    if preview:
+        preview.close()
+    print("Capture stats:", grabber.stats())
+    if motion_gate:
+        print("Motion gate:", motion_gate.stats())
+    if tracker:
+        print("Plate tracker:", tracker.stats())
+    if cache:
+        print("OCR cache:", cache.stats())
+    if SNAPSHOT_DIR:
+        print("Snapshots:", snapshot_writer.stats())
+    if char_classifier:
+        print("Fast recognizer:", {"fast_reads": char_classifier.fast_reads, "fallbacks": char_classifier.fallbacks})
+
+    # Without a valid read fall back to the best partial read, for the operator to correct
+    result, agreement = voter.result()
+    complete = voter.done()
+    if not result:
+        result, agreement = voter.best_partial()
+    print(f"Plate read {result!r} after {voter.frames} frames (agreement {agreement:.2f}, "
+          f"{'complete' if complete else 'partial'})")
 
-        # Display the original frame
-        cv2.imshow("Webcam", frame)
+    # Return the result to the calling code
+    return PlateRead(result, agreement, complete)
+
+# OCR workers shared by several lanes; every lane has its own queue and the workers take jobs from the
+# lanes in turn, so a busy lane cannot starve the others
+class OCRScheduler:
+    def __init__(self, workers=OCR_WORKERS):
+        self.queues = collections.OrderedDict()
+        self.lane_stats = {}
+        self.condition = threading.Condition()
+        self.running = True
+        self.threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, lane, func, *args):
+        future = concurrent.futures.Future()
+        with self.condition:
+            self.queues.setdefault(lane, collections.deque()).append((future, func, args, time.perf_counter()))
+            self.lane_stats.setdefault(lane, {"jobs": 0, "wait": 0.0, "max_wait": 0.0, "ocr": 0.0})
+            self.condition.notify()
+        return future
+
+    def _next_job(self):
+        # Serve the first lane with work, then move it to the back of the line
+        for lane, jobs in self.queues.items():
+            if jobs:
+                self.queues.move_to_end(lane)
+                return lane, jobs.popleft()
+        return None
+
+    def _worker(self):
+        # Load this worker's OCR engine before the first job arrives
+        get_ocr_engine()
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: not self.running or any(self.queues.values()))
+                if not self.running:
+                    return
+                lane, (future, func, args, queued_at) = self._next_job()
+
+            # Skip jobs that were cancelled while queued
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            started = time.perf_counter()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+            with self.condition:
+                stats = self.lane_stats[lane]
+                stats["jobs"] += 1
+                stats["wait"] += started - queued_at
+                stats["max_wait"] = max(stats["max_wait"], started - queued_at)
+                stats["ocr"] += time.perf_counter() - started
+
+    def stats(self):
+        with self.condition:
+            return {lane: {"ocr_jobs": stats["jobs"],
+                           "queued": len(self.queues.get(lane, ())),
+                           "mean_wait_ms": round(1000 * stats["wait"] / max(1, stats["jobs"]), 2),
+                           "max_wait_ms": round(1000 * stats["max_wait"], 2),
+                           "mean_ocr_ms": round(1000 * stats["ocr"] / max(1, stats["jobs"]), 2)}
+                    for lane, stats in self.lane_stats.items()}
+
+    def shutdown(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+# Runs one capture and detection thread per lane (entry, exit, ...) and sends all their OCR work to one
+# shared scheduler; on_plate(lane, plate, agreement) is called for every new plate a lane reads
+class GateSupervisor:
+    def __init__(self, lanes, on_plate, scheduler=None, repeat_seconds=LANE_REPEAT_SECONDS):
+        self.lanes = lanes
+        self.on_plate = on_plate
+        self.scheduler = scheduler or OCRScheduler()
+        self.repeat_seconds = repeat_seconds
+        self.running = False
+        self.threads = {}
+        self.grabbers = {}
+
+    def start(self):
+        self.running = True
+        for lane, source in self.lanes.items():
+            self.grabbers[lane] = FrameGrabber(parse_source(source)).start()
+            self.threads[lane] = threading.Thread(target=self._run_lane, args=(lane,), daemon=True)
+            self.threads[lane].start()
+        return self
+
+    def _run_lane(self, lane):
+        grabber = self.grabbers[lane]
+        motion_gate = MotionGate(region=gate_region) if MOTION_GATE else None
+        tracker = PlateTracker() if TRACKING else None
+        submit = functools.partial(self.scheduler.submit, lane)
+        voter = PlateVoter()
+        cache = make_ocr_cache()
+        last_plate, last_seen = None, 0.0
+
+        while self.running:
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if not grabber.running:
+                    break  # The recording ended or the camera went away
+                continue
+            captured_at, frame = item
+
+            # The lane's cache only lives while a car stands in the gate: it is emptied once the gate goes
+            # quiet, and after every plate that is reported
+            if motion_gate is None or motion_gate.is_active(frame):
+                voter.add(read_number_plate(frame, tracker, submit, cache=cache))
+            elif cache:
+                cache.clear()
+            grabber.record_latency(captured_at)
+
+            if voter.done():
+                plate, agreement = voter.result()
+                voter = PlateVoter()
+
+                # A car waiting at the barrier keeps producing the same read; report it only once
+                now = time.monotonic()
+                if plate != last_plate or now - last_seen > self.repeat_seconds:
+                    self.on_plate(lane, plate, agreement)
+                    if cache:
+                        cache.clear()
+                last_plate, last_seen = plate, now
+
+    def stats(self):
+        ocr_stats = self.scheduler.stats()
+        return {lane: {**grabber.stats(), **ocr_stats.get(lane, {})} for lane, grabber in self.grabbers.items()}
+
+    def wait(self):
+        for thread in self.threads.values():
+            thread.join()
+
+    def stop(self):
+        self.running = False
+        self.wait()
+        for grabber in self.grabbers.values():
+            grabber.release()
+        self.scheduler.shutdown()
+
+# Function to run several gate cameras at once and print every plate read as a JSON line
+def run_supervisor(lane_specs):
+    lanes = dict(spec.split("=", 1) for spec in lane_specs)
+
+    def print_plate(lane, plate, agreement):
+        print(json.dumps({"lane": lane, "plate": plate, "agreement": round(agreement, 2),
+                          "timestamp": datetime.now().isoformat()}), flush=True)
+
+    supervisor = GateSupervisor(lanes, print_plate).start()
+    try:
+        supervisor.wait()
+    except KeyboardInterrupt:
+        pass
+    supervisor.stop()
+    print("Lane stats:", json.dumps(supervisor.stats()), file=sys.stderr)
+    return 0
+
+# Serves the metrics on a local port: /metrics in Prometheus text format and /metrics.json as a snapshot
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
 
-        # Break the loop when 'q' is pressed
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+# Function to start the metrics endpoint on a background thread
+def start_metrics_server(port=METRICS_PORT, host="127.0.0.1"):
+    server = http.server.ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Metrics available at http://{host}:{port}/metrics and /metrics.json", file=sys.stderr)
+    return server
+
+# File extensions picked up when a directory is given to the batch mode
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Function to stream frames from image directories, glob patterns, single images or video files
+def iter_frames(path):
+    if os.path.isdir(path):
+        image_paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                             if name.lower().endswith(IMAGE_EXTENSIONS))
+    elif glob.has_magic(path):
+        image_paths = sorted(glob.glob(path))
+    elif path.lower().endswith(IMAGE_EXTENSIONS):
+        image_paths = [path]
+    else:
+        image_paths = None
+
+    # Images are only named here and decoded by the worker that reads them; every record carries an ISO
+    # timestamp from the file time, plus the offset of the frame into its file in seconds
+    if image_paths is not None:
+        for image_path in image_paths:
+            timestamp = datetime.fromtimestamp(os.path.getmtime(image_path)).isoformat()
+            yield {"source": image_path, "frame": 0, "timestamp": timestamp, "offset_s": 0.0}, None
+        return
+
+    # Video frames are decoded one at a time, so memory stays flat however long the recording is
+    cap = cv2.VideoCapture(path)
+    started = datetime.fromtimestamp(os.path.getmtime(path))
+    frame_index = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
             break
-
-    # Release the webcam and close all windows
+        offset = round(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000, 3)
+        timestamp = (started + timedelta(seconds=offset)).isoformat()
+        yield {"source": path, "frame": frame_index, "timestamp": timestamp, "offset_s": offset}, frame
+        frame_index += 1
     cap.release()
-    cv2.destroyAllWindows()
 
-    # Return the result to the calling code
-    return result
+# Batch worker setup: read candidates serially, since every core is already busy with a frame of its own
+def init_batch_worker():
+    global ocr_pool
+    ocr_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1, initializer=get_ocr_engine)
+
+# Function to read the plate of one batch frame (runs in a worker process); the metrics the worker
+# recorded for it travel back with the record
+def read_batch_frame(item):
+    record, frame = item
+    if frame is None:
+        frame = cv2.imread(record["source"])
+    if frame is not None:
+        # The cache only covers the candidates of this frame, since consecutive frames may show different cars
+        record["plate"] = read_number_plate(frame, cache=make_ocr_cache(1))
+    return record, metrics.drain()
+
+# Function to reprocess recorded images or video through the recognition pipeline and write JSON lines
+def run_batch(inputs, output=None, workers=None):
+    workers = workers or os.cpu_count() or 1
+    out = open(output, 'w') if output else sys.stdout
+    frames = plates = 0
+    start = time.perf_counter()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=init_batch_worker) as pool:
+        # Keep only a couple of frames per worker in flight so the generator is never drained into memory
+        pending = collections.deque()
+        items = (item for path in inputs for item in iter_frames(path))
+        for item in itertools.chain(items, [None]):
+            if item is not None:
+                pending.append(pool.submit(read_batch_frame, item))
+            while pending and (item is None or len(pending) >= 2 * workers):
+                record, worker_metrics = pending.popleft().result()
+                metrics.merge(worker_metrics)
+                frames += 1
+                if record.get("plate"):
+                    plates += 1
+                    out.write(json.dumps(record) + "\n")
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    if output:
+        out.close()
+    print(f"{frames} frames, {plates} plates in {elapsed:.1f}s "
+          f"({frames / elapsed:.1f} frames/s, {plates / elapsed:.2f} plates/s, {workers} workers)", file=sys.stderr)
+    return 0
 
 # Main application
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parking Billing System")
+    subparsers = parser.add_subparsers(dest="command")
+    batch_parser = subparsers.add_parser("batch", help="read plates from image directories, globs or video files")
+    batch_parser.add_argument("inputs", nargs="+", help="image directory, glob pattern, image or video file")
+    batch_parser.add_argument("-o", "--output", help="JSON lines output file (default: stdout)")
+    batch_parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="worker processes")
+    supervise_parser = subparsers.add_parser("supervise", help="read plates from several gate cameras at once")
+    supervise_parser.add_argument("lanes", nargs="+", metavar="LANE=SOURCE",
+                                  help="lane name and camera index or video file, e.g. entry=0 exit=1")
+    args = parser.parse_args()
+
+    if METRICS_PORT:
+        start_metrics_server()
+
+    if args.command == "batch":
+        sys.exit(run_batch(args.inputs, args.output, args.workers))
+    if args.command == "supervise":
+        sys.exit(run_supervisor(args.lanes))
+
     root = tk.Tk()
     app = ParkingSystem(root)
     root.mainloop()
\ No newline at end of file